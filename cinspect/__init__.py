@@ -1,5 +1,11 @@
 from __future__ import absolute_import, print_function
 
-from .cinspect import getfile, getsource
+import sys
+
+from .cinspect import (
+    clear_cache, getfile, getfile_many, getsource, getsource_many, stats
+)
+if sys.version_info[:2] >= (3, 5):
+    from .aio import agetfile, agetsource
 
 __version__ = '0.2.1'
@@ -2,10 +2,26 @@
 
 from __future__ import absolute_import, print_function
 
+from collections import OrderedDict
 import inspect
+from os.path import exists, splitext
+import sys
+import threading
+import weakref
 
 from ._patch_helpers import inspect_restored
 
+# Objects that have already been wrapped.  Objects that can't be weakly
+# referenced (builtin functions, method descriptors, ...) are keyed by their id,
+# and kept alive so that the id isn't reused, and a limited number of them are
+# remembered.
+_wrapped = weakref.WeakKeyDictionary()
+_wrapped_by_id = OrderedDict()
+_wrapped_lock = threading.Lock()
+MAX_WRAPPED_BY_ID = 4096
+
+PYTHON_EXTENSIONS = ('.py', '.pyw', '.pyc', '.pyo')
+
 
 class CInspectObject(object):
     """ A simple wrapper around the object we are trying to inspect. """
@@ -75,21 +91,130 @@ class Type(CInspectObject):
 
 
 def get_cinspect_object(obj):
-    """ Returns the object wrapped in the appropriate CInspectObject class. """
+    """ Returns the object wrapped in the appropriate CInspectObject class.
 
-    try:
-        with inspect_restored():
-            inspect.getsource(obj)
+    Objects are classified by their type, and their source is read only when
+    that is the only way to tell if they are pure-Python objects.  Modules,
+    classes and functions are wrapped only once.
 
-    except (TypeError, IOError):
-        wrapped = _get_cinspect_object(obj)
+    """
 
-    else:
-        wrapped = PythonObject(obj)
+    if not _is_memoizable(obj):
+        return _wrap(obj)
+
+    wrapped = _get_wrapped(obj)
+    if wrapped is None:
+        wrapped = _wrap(obj)
+        _set_wrapped(obj, wrapped)
 
     return wrapped
 
 
+def _get_wrapped(obj):
+    with _wrapped_lock:
+        try:
+            return _wrapped.get(obj)
+        except TypeError:
+            pass
+
+        # The object is kept alive while it is remembered, so its id can't
+        # have been reused by another object.
+        return _wrapped_by_id.get(id(obj), (None, None))[1]
+
+
+def _is_memoizable(obj):
+    """ Return True if the object is a module, a class or a function.
+
+    Methods bound to instances are not, since remembering them would keep the
+    instances alive.
+
+    """
+
+    if inspect.ismodule(obj) or inspect.isclass(obj):
+        return True
+
+    if not inspect.isroutine(obj):
+        return False
+
+    self = getattr(obj, '__self__', None)
+    return self is None or inspect.ismodule(self) or inspect.isclass(self)
+
+
+def _is_python_object(obj):
+    """ Return True if the object is a pure-Python object, False if not.
+
+    Returns None if that can't be told without trying to get its source.
+
+    """
+
+    if hasattr(obj, '__wrapped__'):
+        # inspect looks at the wrapped object, instead.
+        return None
+
+    if inspect.ismethod(obj):
+        obj = obj.__func__
+
+    if inspect.isfunction(obj):
+        return True if exists(obj.__code__.co_filename) else None
+
+    elif inspect.ismodule(obj):
+        path = getattr(obj, '__file__', None)
+        if path is None:
+            return False
+        return None if _is_python_file(path) else False
+
+    elif inspect.isclass(obj):
+        module = sys.modules.get(obj.__module__)
+        path = getattr(module, '__file__', None)
+        if path is None:
+            return False
+        return None if _is_python_file(path) else False
+
+    elif inspect.iscode(obj) or inspect.isframe(obj) or inspect.istraceback(obj):
+        return None
+
+    else:
+        # inspect can't get the source of anything else.
+        return False
+
+
+def _is_python_file(path):
+    """ Return True if the path could be a Python source (or bytecode) file. """
+
+    return splitext(path)[1].lower() in PYTHON_EXTENSIONS
+
+
+def _set_wrapped(obj, wrapped):
+    with _wrapped_lock:
+        try:
+            _wrapped[obj] = wrapped
+            return
+        except TypeError:
+            pass
+
+        _wrapped_by_id[id(obj)] = (obj, wrapped)
+        while len(_wrapped_by_id) > MAX_WRAPPED_BY_ID:
+            _wrapped_by_id.popitem(last=False)
+
+
+def _wrap(obj):
+    """ Return the object wrapped in the appropriate CInspectObject class. """
+
+    is_python = _is_python_object(obj)
+    if is_python is None:
+        try:
+            with inspect_restored():
+                inspect.getsource(obj)
+
+        except (TypeError, IOError):
+            is_python = False
+
+        else:
+            is_python = True
+
+    return PythonObject(obj) if is_python else _get_cinspect_object(obj)
+
+
 def _get_cinspect_object(obj):
     """ Return the object wrapped in the appropriate CInspectObject class.
 
@@ -120,3 +245,56 @@ def _get_cinspect_object(obj):
 
     else:
         raise NotImplementedError
+
+
+class DescribedObject(object):
+    """ An object known only by its description, instead of the object itself.
+
+    Used to look up objects in other processes, like the lookup server.
+
+    """
+
+    name = module = type_name = None
+
+    def __init__(self, name, module, type_name):
+        self.obj = None
+        self.name = name
+        self.module = module
+        self.type_name = type_name
+
+
+_KINDS = dict(
+    (cls.__name__, cls)
+    for cls in (BuiltinFunction, BuiltinMethod, MethodDescriptor, Module, Type)
+)
+_DESCRIBED_KINDS = dict(
+    (name, type(str('Described%s' % name), (DescribedObject, cls), {}))
+    for (name, cls) in _KINDS.items()
+)
+
+
+def describe(obj):
+    """ Return a serializable description of a (non-Python) wrapped object. """
+
+    for kind, cls in _KINDS.items():
+        if type(obj) in (cls, _DESCRIBED_KINDS[kind]):
+            break
+    else:
+        raise RuntimeError('Cannot describe %s' % obj)
+
+    return {
+        'kind': kind,
+        'name': obj.name,
+        'module': obj.module,
+        'type_name': obj.type_name,
+    }
+
+
+def from_description(description):
+    """ Return an object that can be looked up, given its description. """
+
+    cls = _DESCRIBED_KINDS.get(description.get('kind'))
+    if cls is None:
+        raise RuntimeError('Unknown kind of object: %s' % description.get('kind'))
+
+    return cls(description['name'], description['module'], description['type_name'])
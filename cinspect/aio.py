@@ -0,0 +1,159 @@
+""" Coroutines to inspect objects, without blocking the event loop.
+
+Loading indexes, and reading sources from them, is done in an executor.  All
+the concurrent lookups in an index, that needs to be (re)loaded, wait for the
+same load to finish.
+
+NOTE: This module is only available in Python 3.5 and later.
+
+"""
+
+from __future__ import absolute_import, print_function
+
+import asyncio
+import inspect
+
+from .index.reader import get_reader
+from ._patch_helpers import inspect_restored
+from ._types import CInspectObject, PythonObject, get_cinspect_object
+
+# The loads of indexes that are in progress, keyed by event loop and path.
+_loads = {}
+
+
+async def agetfile(obj, index_path=None, executor=None):
+    """ Return the file where the object has been defined. """
+
+    obj = await _get_cinspect_object(obj, executor)
+    if isinstance(obj, PythonObject):
+        return await _run(executor, _get_python_file, obj.obj)
+
+    return await AsyncReader(index_path, executor).get_file(obj)
+
+
+async def agetsource(obj, index_path=None, executor=None):
+    """ Return the source of the object. """
+
+    obj = await _get_cinspect_object(obj, executor)
+    if isinstance(obj, PythonObject):
+        return await _run(executor, _get_python_source, obj.obj)
+
+    return await AsyncReader(index_path, executor).get_source(obj)
+
+
+class AsyncReader(object):
+    """ A reader whose lookups are coroutines.
+
+    The lookups are done by the shared reader for the index, in an executor:
+    by the lookup server, if it is running, and in the index loaded by the
+    reader, otherwise.
+
+    """
+
+    def __init__(self, index_path=None, executor=None):
+        self.index_path = index_path
+        self.executor = executor
+        self._reader = None
+
+    async def get_file(self, obj):
+        """ Return the file where the object has been defined. """
+
+        return await self._lookup(obj, 'path')
+
+    async def get_files(self, objs):
+        """ Return a mapping of the objects to the files defining them. """
+
+        return await self._lookup_many(objs, 'path')
+
+    async def get_source(self, obj):
+        """ Return the source for the object. """
+
+        return await self._lookup(obj, 'source')
+
+    async def get_sources(self, objs):
+        """ Return a mapping of the objects to their sources. """
+
+        return await self._lookup_many(objs, 'source')
+
+    async def _lookup(self, obj, key):
+        """ Look up the given item of the data for the object. """
+
+        results = await self._lookup_in_server([obj], key)
+        if results is not None:
+            if isinstance(results[0], Exception):
+                raise results[0]
+            return results[0]
+
+        reader = await self._get_reader()
+        index = await self._get_index(reader)
+        data = await _run(self.executor, reader._get_data, obj, index)
+        return await _run(self.executor, reader._get_item, data, key)
+
+    async def _lookup_many(self, objs, key):
+        """ Look up the given item of the data for all the objects. """
+
+        objs = list(objs)
+        results = await self._lookup_in_server(objs, key)
+        if results is not None:
+            return dict(zip(objs, results))
+
+        reader = await self._get_reader()
+        await self._get_index(reader)
+        return await _run(self.executor, reader._get_data_many, objs, key)
+
+    async def _lookup_in_server(self, objs, key):
+        """ Return the results from the lookup server, or None if it isn't
+        running (or isn't used by the reader).
+
+        """
+
+        reader = await self._get_reader()
+        if reader._client is None:
+            return None
+
+        return await _run(
+            self.executor, reader._client.lookup, reader.index_path, objs, key
+        )
+
+    async def _get_index(self, reader):
+        """ Return the loaded index, sharing any load already in progress. """
+
+        key = (id(asyncio.get_event_loop()), reader.index_path)
+        future = _loads.get(key)
+        if future is None:
+            future = _loads[key] = asyncio.ensure_future(
+                _run(self.executor, reader._get_index)
+            )
+            future.add_done_callback(lambda _: _loads.pop(key, None))
+
+        # Shielded, so that cancelling one lookup doesn't cancel the others.
+        return await asyncio.shield(future)
+
+    async def _get_reader(self):
+        if self._reader is None:
+            # Finding the index path could look through the index directory.
+            self._reader = await _run(self.executor, get_reader, self.index_path)
+
+        return self._reader
+
+
+async def _get_cinspect_object(obj, executor):
+    if isinstance(obj, CInspectObject):
+        return obj
+
+    # Classifying Python objects reads their source files.
+    return await _run(executor, get_cinspect_object, obj)
+
+
+def _get_python_file(obj):
+    with inspect_restored():
+        return inspect.getfile(obj)
+
+
+def _get_python_source(obj):
+    with inspect_restored():
+        return inspect.getsource(obj)
+
+
+def _run(executor, function, *args):
+    return asyncio.get_event_loop().run_in_executor(executor, function, *args)
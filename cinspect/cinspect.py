@@ -1,8 +1,10 @@
 from __future__ import absolute_import, print_function
 
+from collections import OrderedDict
 import inspect
 
-from .index.reader import Reader
+from .index.reader import Reader, clear_cache, get_reader
+from .index.stats import get_stats
 from ._patch_helpers import inspect_restored
 from ._types import CInspectObject, PythonObject, get_cinspect_object
 
@@ -16,11 +18,21 @@ def getfile(obj, index_path=None):
             path = inspect.getfile(obj.obj)
 
     else:
-        path = Reader(index_path).get_file(obj)
+        path = get_reader(index_path).get_file(obj)
 
     return path
 
 
+def getfile_many(objs, index_path=None):
+    """ Return a mapping of the objects to the files defining them.
+
+    See `getsource_many` for details.
+
+    """
+
+    return _get_many(objs, index_path, inspect.getfile, Reader.get_files)
+
+
 def getsource(obj, index_path=None):
     if not isinstance(obj, CInspectObject):
         obj = get_cinspect_object(obj)
@@ -30,6 +42,80 @@ def getsource(obj, index_path=None):
             source = inspect.getsource(obj.obj)
 
     else:
-        source = Reader(index_path).get_source(obj)
+        source = get_reader(index_path).get_source(obj)
 
     return source
+
+
+def getsource_many(objs, index_path=None):
+    """ Return a mapping of the objects to their sources.
+
+    All the objects that are not pure-Python are looked up together, in the
+    same index.  If the source of an object couldn't be found, the exception
+    raised is its value in the mapping, instead of the source.
+
+    Unhashable objects (like instances of lists, whose type is inspected) are
+    keyed by their `id`.
+
+    """
+
+    return _get_many(objs, index_path, inspect.getsource, Reader.get_sources)
+
+
+def stats():
+    """ Return the statistics of loading indexes, and looking up objects.
+
+    See `cinspect.index.stats` for the statistics, and to add hooks called
+    with each event.
+
+    """
+
+    return get_stats()
+
+
+def _get_many(objs, index_path, get_python, get_indexed):
+    """ Look up the objects, using get_python for pure-Python objects, and
+    the get_indexed method of the Reader for all the others.
+
+    """
+
+    results = OrderedDict()
+    wrapped = {}
+    for obj in objs:
+        key = _get_key(obj)
+        try:
+            if not isinstance(obj, CInspectObject):
+                obj = get_cinspect_object(obj)
+
+            if isinstance(obj, PythonObject):
+                with inspect_restored():
+                    results[key] = get_python(obj.obj)
+
+            else:
+                results[key] = None
+                wrapped[obj] = key
+
+        except Exception as e:
+            results[key] = e
+
+    if len(wrapped) > 0:
+        try:
+            found = get_indexed(get_reader(index_path), wrapped)
+        except Exception as e:
+            found = dict((obj, e) for obj in wrapped)
+
+        for obj, key in wrapped.items():
+            results[key] = found[obj]
+
+    return results
+
+
+def _get_key(obj):
+    """ Return the key for the object, in the results of a batch lookup. """
+
+    try:
+        hash(obj)
+    except TypeError:
+        return id(obj)
+
+    return obj
@@ -1,10 +1,18 @@
 from __future__ import absolute_import, print_function
 
 import glob
-from os.path import dirname
+from hashlib import md5
+import json
+import os
+from os.path import dirname, exists, expanduser, isdir, join, realpath
 import subprocess
 
 import cinspect.vendor.clang.cindex as CI
+from cinspect.index._files import write_text
+from cinspect.index.serialize import INDEX_DIR
+
+# The include flags found for each libclang library, and clang arguments.
+HEADERS_CACHE_PATH = join(INDEX_DIR, 'clang-headers.json')
 
 
 def can_find_clang_headers(clang_args):
@@ -20,6 +28,36 @@ def can_find_clang_headers(clang_args):
     return len(tu.diagnostics) == 0
 
 
+def find_clang_headers(clang_args):
+    """Return the include flags libclang needs to find its own headers, in
+    addition to the given arguments.
+
+    The flags are saved in HEADERS_CACHE_PATH, keyed by the library (its
+    path, size and modification time) and the arguments, and are reused as
+    long as the include directories exist.  When no flags are needed, that
+    is saved too, but not when none could be found.
+
+    """
+
+    key = _get_headers_cache_key(clang_args)
+    cache = _read_headers_cache()
+    flags = cache.get(key)
+    if flags is not None and all(isdir(flag[len('-I'):]) for flag in flags):
+        return flags
+
+    if can_find_clang_headers(clang_args):
+        flags = []
+    else:
+        flags = get_libclang_headers()
+        if len(flags) == 0:
+            # Nothing was found, so look again the next time.
+            return flags
+
+    cache[key] = flags
+    _write_headers_cache(cache)
+    return flags
+
+
 def get_libclang_headers():
     try:
         paths = _ask_clang()
@@ -39,6 +77,27 @@ def _ask_clang():
     return output[start:end].split()
 
 
+def _get_headers_cache_key(clang_args):
+    """Return the key of the include flags for the library, and arguments.
+
+    The version of the library isn't available through the bindings, but
+    its real path (like libclang-3.5.so.1), size and modification time
+    change when it is upgraded.
+
+    """
+
+    path = CI.conf.get_filename()
+    if exists(path):
+        path = realpath(path)
+        st = os.stat(path)
+        library = [path, st.st_size, st.st_mtime]
+    else:
+        # Found by the dynamic loader, from its name.
+        library = [path]
+
+    return md5(json.dumps([library, clang_args]).encode('utf8')).hexdigest()
+
+
 def _guess_paths(library_path=None):
     """Tries to look for clang headers in known paths.
 
@@ -77,6 +136,25 @@ def _guess_paths(library_path=None):
     return []
 
 
+def _read_headers_cache():
+    path = expanduser(HEADERS_CACHE_PATH)
+    if not exists(path):
+        return {}
+
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except ValueError:
+        return {}
+
+
+def _write_headers_cache(cache):
+    path = expanduser(HEADERS_CACHE_PATH)
+    if not exists(dirname(path)):
+        os.makedirs(dirname(path))
+    write_text(path, json.dumps(cache, indent=2, sort_keys=True))
+
+
 if __name__ == '__main__':
     CI.Config.set_library_file('/usr/lib/x86_64-linux-gnu/libclang.so.1')
     print(get_libclang_headers())
@@ -0,0 +1,38 @@
+""" Helpers to write index files, without readers seeing partial writes. """
+
+from __future__ import absolute_import, print_function
+
+# Standard library
+import os
+from os.path import exists
+
+
+def get_temp_path(path):
+    """ Return a path to write to, before replacing the given path. """
+
+    temp_path = '%s.%d.tmp' % (path, os.getpid())
+    if exists(temp_path):
+        os.unlink(temp_path)
+
+    return temp_path
+
+
+def replace_file(src, dst):
+    """ Move src to dst, replacing dst if it exists. """
+
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        # Python 2.x: rename doesn't overwrite existing files on Windows.
+        if os.name == 'nt' and exists(dst):
+            os.unlink(dst)
+        os.rename(src, dst)
+
+
+def write_text(path, text):
+    """ Write the text to a temporary file, and move it to the given path. """
+
+    temp_path = get_temp_path(path)
+    with open(temp_path, 'w') as f:
+        f.write(text)
+    replace_file(temp_path, path)
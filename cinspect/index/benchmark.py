@@ -0,0 +1,374 @@
+#!/usr/bin/env python
+""" Benchmarks of loading indexes, and looking up objects in them.
+
+Usage: cinspect-benchmark [--sizes 1000 ...] [--formats sqlite ...] [--output PATH]
+
+Synthetic indexes with the given number of entries are generated, and saved
+in each of the storage formats.  For each index, the benchmark measures
+
+ - the time to write it, and its size on disk,
+ - the time to load it, and to look up the first object (cold),
+ - the latency of lookups of each kind of object, once loaded (warm),
+ - the latency of lookups of objects not in the index (misses), and
+ - the peak resident memory of a new process, before and after loading it and
+   looking up objects (including the pages mapped or cached by the storage
+   format, not only the Python heap).
+
+The results are printed (or saved) as JSON.
+
+"""
+
+from __future__ import absolute_import, print_function
+
+# Standard library
+import json
+import os
+from os.path import abspath, dirname, getsize, isdir, join
+import platform
+import random
+from shutil import rmtree
+import subprocess
+import sys
+import tempfile
+from timeit import default_timer as timer
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+# Local library
+from .._types import from_description
+from .reader import Reader
+from .serialize import EXTENSIONS, FORMATS, write_index
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+# The kinds of objects looked up.
+KINDS = ('Type', 'Module', 'BuiltinFunction', 'MethodDescriptor')
+
+# The number of entries per module, and per type, in the synthetic indexes.
+MODULE_SIZE = 100
+TYPE_SIZE = 10
+
+SOURCE_TEMPLATE = """static PyObject *
+%(name)s(PyObject *self, PyObject *args)
+{
+    /* %(name)s: a synthetic function, for benchmarks. */
+    Py_RETURN_NONE;
+}
+"""
+
+
+def generate_index(size, seed=0):
+    """ Return the data of a synthetic index, with about size entries.
+
+    Every module and type has a method map, and the functions (methods) are
+    spread over all the method maps.  The Python names of the methods are
+    shared by many method maps, like names of real methods are.
+
+    """
+
+    rng = random.Random(seed)
+    module_count = max(size // MODULE_SIZE, 1)
+    type_count = max(size // TYPE_SIZE, 1)
+    method_count = max(size - module_count - type_count, 1)
+
+    data = {
+        'objects': {}, 'methods': {}, 'method_names': {}, 'modules': {},
+        'hashes': {},
+    }
+
+    owners = []
+    for i in range(module_count):
+        name = 'module%d' % i
+        path = '/src/Modules/%s.c' % name
+        data['modules'][name] = {
+            'source': '/* The %s module. */\n' % name,
+            'path': path,
+            'method_maps': ['%s_methods' % name],
+        }
+        data['hashes'][path] = '%032x' % rng.getrandbits(128)
+        owners.append((name, path))
+
+    for i in range(type_count):
+        name = 'Type%d' % i
+        path = owners[i % module_count][1]
+        data['objects'][name] = {
+            'source': 'static PyTypeObject %s = {\n};\n' % name,
+            'path': path,
+            'references': ['%s_methods' % name],
+        }
+        owners.append((name, path))
+
+    for i in range(method_count):
+        owner, path = owners[i % len(owners)]
+        map_name = '%s_methods' % owner
+        mapping = data['method_names'].setdefault(map_name, {})
+        name = '%s_method%d' % (owner, len(mapping))
+        data['methods'][name] = {
+            'source': SOURCE_TEMPLATE % {'name': name},
+            'path': path,
+        }
+        mapping['method%d' % len(mapping)] = name
+
+    return data
+
+
+def get_descriptions(data, count, seed=0):
+    """ Return descriptions of objects in the index, and of missing ones.
+
+    Returns a mapping of each kind to descriptions of count objects of the
+    kind, and a list of count descriptions of objects not in the index.
+
+    """
+
+    rng = random.Random(seed)
+    modules = sorted(data['modules'])
+    types = sorted(data['objects'])
+
+    def sample(names):
+        return [rng.choice(names) for _ in range(count)]
+
+    def sample_methods(owners):
+        methods = []
+        for owner in sample(owners):
+            mapping = data['method_names'].get('%s_methods' % owner) or {'': ''}
+            methods.append((owner, rng.choice(sorted(mapping))))
+        return methods
+
+    found = {
+        'Type': [_describe('Type', name) for name in sample(types)],
+        'Module': [_describe('Module', name) for name in sample(modules)],
+        'BuiltinFunction': [
+            _describe('BuiltinFunction', name, module=module)
+            for (module, name) in sample_methods(modules)
+        ],
+        'MethodDescriptor': [
+            _describe('MethodDescriptor', name, type_name=type_name)
+            for (type_name, name) in sample_methods(types)
+        ],
+    }
+    missing = [
+        _describe(KINDS[i % len(KINDS)], 'missing%d' % i,
+                  module=rng.choice(modules), type_name=rng.choice(types))
+        for i in range(count)
+    ]
+
+    return found, missing
+
+
+def run_benchmark(data, format, directory, lookups=1000, seed=0):
+    """ Run the benchmark for the index data saved in the given format. """
+
+    path = join(directory, 'index%s' % EXTENSIONS[format])
+    descriptions, missing = get_descriptions(data, lookups, seed)
+    found = dict(
+        (kind, [from_description(d) for d in descriptions])
+        for (kind, descriptions) in descriptions.items()
+    )
+    missing = [from_description(d) for d in missing]
+
+    start = timer()
+    write_index(path, data, format)
+    write_time = timer() - start
+
+    reader = Reader(path, server=False)
+    start = timer()
+    reader._get_index()
+    load_time = timer() - start
+
+    start = timer()
+    reader.get_source(found['Type'][0])
+    first_lookup_time = timer() - start
+
+    # Warm up, before measuring the warm lookups.
+    for objs in found.values():
+        for obj in objs:
+            reader.get_source(obj)
+
+    results = {
+        'format': format,
+        'size_on_disk': _get_size(path),
+        'write': write_time,
+        'load': load_time,
+        'first_lookup': first_lookup_time,
+        'lookups': dict(
+            (kind, _time_lookups(reader, objs)) for (kind, objs) in found.items()
+        ),
+        'misses': _time_lookups(reader, missing),
+        'memory': _get_peak_memory(path, descriptions),
+    }
+
+    reader._get_index().close()
+    return results
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, formats=FORMATS, lookups=1000, seed=0):
+    """ Run the benchmarks for all the sizes and formats, and return the
+    results.
+
+    """
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'lookups': lookups,
+        'results': [],
+    }
+
+    for size in sizes:
+        data = generate_index(size, seed)
+        for format in formats:
+            directory = tempfile.mkdtemp()
+            try:
+                result = run_benchmark(data, format, directory, lookups, seed)
+            finally:
+                rmtree(directory)
+            result['entries'] = size
+            results['results'].append(result)
+
+    return results
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Benchmark loading indexes, and looking up objects.',
+    )
+    parser.add_argument(
+        '--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES),
+        help='numbers of entries in the synthetic indexes'
+    )
+    parser.add_argument(
+        '--formats', nargs='+', default=list(FORMATS), choices=FORMATS,
+        help='storage formats to benchmark'
+    )
+    parser.add_argument(
+        '--lookups', type=int, default=1000,
+        help='number of objects of each kind to look up'
+    )
+    parser.add_argument(
+        '--seed', type=int, default=0, help='seed for the synthetic indexes'
+    )
+    parser.add_argument(
+        '--output', help='path to save the results at (default: stdout)'
+    )
+
+    args = parser.parse_args()
+    results = run_benchmarks(args.sizes, args.formats, args.lookups, args.seed)
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text)
+
+
+def _describe(kind, name, module=None, type_name=None):
+    return {'kind': kind, 'name': name, 'module': module, 'type_name': type_name}
+
+
+def _get_size(path):
+    """ Return the size of the index file, or of all the files in it. """
+
+    if not isdir(path):
+        return getsize(path)
+
+    return sum(
+        getsize(join(root, name))
+        for (root, _, names) in os.walk(path)
+        for name in names
+    )
+
+
+def _get_max_rss():
+    """ Return the peak resident memory of this process, in bytes. """
+
+    # On Linux, ru_maxrss includes the memory of the parent process, before
+    # this one was executed, but the high water mark in /proc doesn't.
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except IOError:
+        pass
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # It is in kilobytes, except on macOS.
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def _get_peak_memory(path, descriptions):
+    """ Return the peak resident memory of a new process, before and after
+    loading the index and looking up the objects.  Returns None, if it can't
+    be measured.
+
+    The memory is measured in a new process for each index, since the peak
+    resident memory of a process never goes down.
+
+    """
+
+    if resource is None:
+        return None
+
+    env = dict(os.environ)
+    root = dirname(dirname(dirname(abspath(__file__))))
+    env['PYTHONPATH'] = os.pathsep.join(
+        [root] + [p for p in [env.get('PYTHONPATH')] if p]
+    )
+    command = [
+        sys.executable, '-c',
+        'from cinspect.index.benchmark import _measure_memory; _measure_memory()'
+    ]
+    process = subprocess.Popen(
+        command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env
+    )
+    request = json.dumps({'path': path, 'descriptions': descriptions})
+    output, _ = process.communicate(request.encode('utf8'))
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+    return json.loads(output.decode('utf8'))
+
+
+def _measure_memory():
+    """ Load an index and look up objects, given as JSON on stdin, and print
+    the peak resident memory before and after, as JSON.
+
+    """
+
+    request = json.loads(sys.stdin.read())
+    baseline = _get_max_rss()
+    reader = Reader(request['path'], server=False)
+    for descriptions in request['descriptions'].values():
+        for description in descriptions:
+            reader.get_source(from_description(description))
+    peak = _get_max_rss()
+    reader._get_index().close()
+
+    print(json.dumps({'baseline': baseline, 'peak': peak}))
+
+
+def _time_lookups(reader, objs):
+    """ Return the median and the 95th percentile of the lookup times. """
+
+    times = []
+    for obj in objs:
+        start = timer()
+        reader.get_source(obj)
+        times.append(timer() - start)
+
+    times.sort()
+    return {
+        'count': len(times),
+        'median': times[len(times) // 2] if len(times) > 0 else None,
+        'p95': times[int(len(times) * 0.95)] if len(times) > 0 else None,
+    }
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+""" Storing indexes as metadata, and a memory-mapped blob of sources.
+
+The index is a single file with a header, the metadata of all the entries as
+JSON, and all the sources as one contiguous UTF-8 blob.  Instead of the
+source, each entry in the metadata has the (offset, length) of its source in
+the blob.
+
+    CINSPECT-BLOB\\x00\\x01\\x00 | metadata length (8 bytes) | metadata | sources
+
+The file is memory-mapped when it is read, and sources are sliced out of it
+only when they are looked up.  Looking up the path of an object doesn't touch
+the sources at all, and the pages of the file are shared by all the processes
+reading the same index.
+
+"""
+
+from __future__ import absolute_import, print_function
+
+# Standard library
+import json
+import mmap
+import struct
+
+# Local library
+from ._files import get_temp_path, replace_file
+from .lookup import BaseIndex, build_lookup_tables
+from .stats import record_bytes
+
+BLOB_MAGIC = b'CINSPECT-BLOB\x00\x01\x00'
+HEADER = struct.Struct('>Q')
+
+# The sections of the index whose entries have sources.  Modules are first,
+# since their source is the text of the whole file.
+SOURCE_SECTIONS = ('modules', 'objects', 'methods')
+
+
+def is_blob_index(db):
+    """ Return True if the file at the given path is a blob index. """
+
+    with open(db, 'rb') as f:
+        header = f.read(len(BLOB_MAGIC))
+
+    return header == BLOB_MAGIC
+
+
+def read_blob_index(db):
+    """ Read the complete index, with all the sources, as a dictionary. """
+
+    index = BlobIndex(db)
+    try:
+        data = index.metadata
+        for section in SOURCE_SECTIONS:
+            for entry in data.get(section, {}).values():
+                entry['source'] = index.get_source(entry.pop('span'))
+
+    finally:
+        index.close()
+
+    return data
+
+
+def write_blob_index(db, data):
+    """ Write the index data to the given path, separating out the sources.
+
+    Each source is saved only once in the blob.  Module entries have the whole
+    text of their file as the source, and the sources of the other entries
+    from the same file refer to byte ranges in that text, at the extents
+    saved by the indexer.
+
+    """
+
+    metadata = dict(
+        (key, value) for (key, value) in data.items()
+        if key not in SOURCE_SECTIONS
+    )
+    blob = _SourceBlob()
+
+    for section in SOURCE_SECTIONS:
+        entries = metadata[section] = {}
+        for name, entry in sorted(data.get(section, {}).items()):
+            entry = dict(entry)
+            entry['span'] = blob.add(
+                entry.pop('source'), entry.get('path'), entry.get('extent'),
+                is_file=(section == 'modules')
+            )
+            entries[name] = entry
+
+    metadata = json.dumps(metadata, sort_keys=True).encode('utf8')
+
+    temp_db = get_temp_path(db)
+    with open(temp_db, 'wb') as f:
+        f.write(BLOB_MAGIC)
+        f.write(HEADER.pack(len(metadata)))
+        f.write(metadata)
+        for source in blob.sources:
+            f.write(source)
+    replace_file(temp_db, db)
+
+
+class BlobEntry(dict):
+    """ An index entry, whose source is read from the blob only when used. """
+
+    def __init__(self, index, entry):
+        super(BlobEntry, self).__init__(entry)
+        self._index = index
+
+    def __missing__(self, key):
+        if key != 'source' or 'span' not in self:
+            raise KeyError(key)
+
+        return self._index.get_source(self['span'])
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class BlobIndex(BaseIndex):
+    """ Lookups into a blob index, slicing sources out of the mapped file. """
+
+    def __init__(self, db):
+        with open(db, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        start = len(BLOB_MAGIC)
+        size, = HEADER.unpack(self._mmap[start:start + HEADER.size])
+        start += HEADER.size
+        self.metadata = json.loads(self._mmap[start:start + size].decode('utf8'))
+        self._sources_offset = start + size
+        record_bytes(size, index_path=db)
+
+        if 'module_methods' not in self.metadata:
+            build_lookup_tables(self.metadata)
+        self.lookup_tables = self.metadata
+
+    def close(self):
+        self._mmap.close()
+
+    def get_method(self, name):
+        return self._get_entry('methods', name)
+
+    def get_method_map(self, name):
+        return self.metadata.get('method_names', {}).get(name)
+
+    def get_module(self, name):
+        return self._get_entry('modules', name)
+
+    def get_object(self, name):
+        return self._get_entry('objects', name)
+
+    def get_source(self, span):
+        """ Return the source at the given (offset, length) in the blob. """
+
+        offset, length = span
+        start = self._sources_offset + offset
+        record_bytes(length)
+        return self._mmap[start:start + length].decode('utf8')
+
+    def _get_entry(self, section, name):
+        entry = self.metadata.get(section, {}).get(name)
+        return BlobEntry(self, entry) if entry is not None else None
+
+
+class _SourceBlob(object):
+    """ The sources to be written to a blob, with each source added once. """
+
+    def __init__(self):
+        self.sources = []
+        self.size = 0
+        self._files = {}
+        self._offsets = {}
+
+    def add(self, source, path=None, extent=None, is_file=False):
+        """ Add the source from the given file, and return its span.
+
+        If is_file is True, the source is the text of the file.  The sources
+        added later, with their (start, end) byte extent in the file, refer
+        to that text, if it has the same bytes at the extent.
+
+        """
+
+        source = source.encode('utf8')
+        offset = self._offsets.get(source)
+        if offset is not None:
+            return [offset, len(source)]
+
+        if extent is not None and path in self._files:
+            file_offset, text = self._files[path]
+            start, end = extent
+            if text[start:end] == source:
+                return [file_offset + start, len(source)]
+
+        offset = self._offsets[source] = self.size
+        if is_file and path is not None and path not in self._files:
+            self._files[path] = (offset, source)
+        self.sources.append(source)
+        self.size += len(source)
+
+        return [offset, len(source)]
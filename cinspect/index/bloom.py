@@ -0,0 +1,77 @@
+""" A Bloom filter of the names in an index, to reject misses quickly.
+
+The filter is built when the index is written, and saved with it.  A name
+that is not in the filter is definitely not in the index, and looking it up
+can be skipped.  A name that is in the filter is most probably in the index.
+
+"""
+
+from __future__ import absolute_import, print_function
+
+# Standard library
+import base64
+from hashlib import md5
+import math
+import struct
+
+# The rate of false positives the filters are sized for.
+FALSE_POSITIVE_RATE = 0.01
+
+_HASH = struct.Struct('>QQ')
+
+
+class BloomFilter(object):
+    """ A set of strings, that may have false positives. """
+
+    def __init__(self, size, hashes, bits=None):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray((size + 7) // 8) if bits is None else bits
+
+    def __contains__(self, key):
+        bits = self.bits
+        for position in self._get_positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+
+        return True
+
+    def add(self, key):
+        for position in self._get_positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    @classmethod
+    def for_keys(cls, keys, rate=FALSE_POSITIVE_RATE):
+        """ Return a filter of the given keys, sized for them. """
+
+        keys = list(keys)
+        count = max(len(keys), 1)
+        size = max(int(math.ceil(-count * math.log(rate) / math.log(2) ** 2)), 8)
+        hashes = max(int(round(float(size) / count * math.log(2))), 1)
+
+        bloom_filter = cls(size, hashes)
+        for key in keys:
+            bloom_filter.add(key)
+
+        return bloom_filter
+
+    @classmethod
+    def from_dict(cls, data):
+        """ Return the filter, from its description saved in an index. """
+
+        bits = bytearray(base64.b64decode(data['bits'].encode('ascii')))
+        return cls(data['size'], data['hashes'], bits)
+
+    def to_dict(self):
+        """ Return a description of the filter, that can be saved as JSON. """
+
+        return {
+            'size': self.size,
+            'hashes': self.hashes,
+            'bits': base64.b64encode(bytes(self.bits)).decode('ascii'),
+        }
+
+    def _get_positions(self, key):
+        # Double hashing, with the two halves of one digest.
+        first, second = _HASH.unpack(md5(key.encode('utf8')).digest())
+        return [(first + i * second) % self.size for i in range(self.hashes)]
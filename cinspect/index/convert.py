@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+""" A script to convert existing indexes to a different storage format.
+
+Usage: cinspect-convert [--format sqlite] [paths ...]
+
+Converts all the JSON indexes in ~/.cinspect, if no paths are given.  The
+converted index is saved next to the original one, with the extension of the
+new format.
+
+"""
+
+from __future__ import absolute_import, print_function
+
+# Standard library
+import glob
+from os.path import expanduser, join, splitext
+
+# Local library
+from .serialize import (
+    EXTENSIONS, FORMATS, INDEX_DIR, convert_index, get_index_format
+)
+
+
+def get_converted_path(path, format):
+    """ Return the path to save the given index at, in the new format. """
+
+    return splitext(path)[0] + EXTENSIONS[format]
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Convert indexes to a different storage format.',
+    )
+    parser.add_argument(
+        'paths', nargs='*',
+        help='paths of the indexes to convert (default: ~/.cinspect/*.json)'
+    )
+    parser.add_argument(
+        '--format', default='sqlite', choices=FORMATS,
+        help='storage format to convert the indexes to'
+    )
+
+    args = parser.parse_args()
+    paths = args.paths or sorted(
+        glob.glob(expanduser(join(INDEX_DIR, 'index-*.json')))
+    )
+
+    for path in paths:
+        if get_index_format(path) == args.format:
+            print('Skipping %s, already in %s format' % (path, args.format))
+            continue
+
+        dst = get_converted_path(path, args.format)
+        print('Converting %s to %s' % (path, dst))
+        convert_index(path, dst, args.format)
+
+
+if __name__ == '__main__':
+    main()
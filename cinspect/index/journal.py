@@ -0,0 +1,212 @@
+""" A journal of the changes to a JSON index, to avoid rewriting it.
+
+Incremental updates of a JSON index are appended to a journal next to it, as
+one line of JSON per update, with the new entries (or null, for removed
+entries) of each section that changed.
+
+    index-x.y.z.json
+    index-x.y.z.json.journal
+
+Each update is committed by writing its line completely, and readers ignore
+an incomplete last line, which is removed before the next update is written.  The journal is applied to the index when it is
+read, and when the journal grows too large, the index is compacted: the
+complete index is written again, and the journal is removed.
+
+The first line of the journal identifies the index file it applies to (by its
+inode, size and modification time).  A journal left over from before the
+index was written again is ignored, and is replaced on the next update.
+
+"""
+
+from __future__ import absolute_import, print_function
+
+# Standard library
+import json
+import os
+from os.path import exists, getsize
+
+# Local library
+from ._files import get_temp_path, replace_file
+
+JOURNAL_SUFFIX = '.journal'
+
+# The sections of the index that are saved in the journal.  The lookup tables
+# are built again, from the index with the journal applied.
+JOURNAL_SECTIONS = (
+    'objects', 'methods', 'method_names', 'modules', 'hashes', 'file_stats',
+    'files', 'failures',
+)
+
+# The index is compacted, when the journal is larger than this fraction of it.
+COMPACTION_RATIO = 0.25
+
+
+def append_journal(db, changes):
+    """ Append the changes to the journal of the index. """
+
+    path = get_journal_path(db)
+    line = json.dumps(changes, sort_keys=True) + '\n'
+    header = _get_header(db)
+    if _read_header(path) != header:
+        # Start a new journal for the index.
+        temp_path = get_temp_path(path)
+        with open(temp_path, 'w') as f:
+            f.write(json.dumps(header) + '\n')
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        replace_file(temp_path, path)
+        return
+
+    with open(path, 'rb+') as f:
+        # An update that was being written when a writer crashed is dropped,
+        # so that this one starts on a new line.
+        _truncate_incomplete_line(f)
+        f.write(line.encode('utf8'))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def apply_journal(db, data):
+    """ Apply the changes in the journal to the index data.
+
+    Returns True if there were any changes in the journal.
+
+    """
+
+    changes = read_journal(db)
+    for change in changes:
+        for section, entries in change.items():
+            values = data.setdefault(section, {})
+            for name, value in entries.items():
+                if value is None:
+                    values.pop(name, None)
+                else:
+                    values[name] = value
+
+    return len(changes) > 0
+
+
+def get_changes(original, data):
+    """ Return the changes to the data, since the given snapshot of it.
+
+    Entries have to be replaced (not modified in place), for their changes to
+    be found.
+
+    """
+
+    changes = {}
+    for section in JOURNAL_SECTIONS:
+        old = original.get(section, {})
+        new = data.get(section, {})
+        # Updated entries are new objects, so unchanged ones are the same.
+        entries = dict(
+            (name, value) for (name, value) in new.items()
+            if old.get(name) is not value
+        )
+        entries.update((name, None) for name in old if name not in new)
+        if len(entries) > 0:
+            changes[section] = entries
+
+    return changes
+
+
+def get_journal_path(db):
+    return db + JOURNAL_SUFFIX
+
+
+def get_journal_size(db):
+    """ Return the size of the journal of the index, or 0 if it has none. """
+
+    try:
+        return getsize(get_journal_path(db))
+    except OSError:
+        return 0
+
+
+def needs_compaction(db):
+    """ Return True if the journal of the index is too large. """
+
+    return get_journal_size(db) > COMPACTION_RATIO * getsize(db)
+
+
+def read_journal(db):
+    """ Return all the changes in the journal of the index. """
+
+    path = get_journal_path(db)
+    if not exists(path):
+        return []
+
+    changes = []
+    with open(path) as f:
+        if _parse_line(f.readline()) != _get_header(db):
+            return []
+
+        for line in f:
+            change = _parse_line(line)
+            if change is None:
+                # An update that is still being written.
+                break
+            changes.append(change)
+
+    return changes
+
+
+def remove_journal(db):
+    path = get_journal_path(db)
+    if exists(path):
+        os.unlink(path)
+
+
+def snapshot(data):
+    """ Return a snapshot of the data, to find the changes made to it. """
+
+    return dict(
+        (section, dict(data.get(section, {}))) for section in JOURNAL_SECTIONS
+    )
+
+
+def _get_header(db):
+    """ Return the header of the journal, for the index file. """
+
+    st = os.stat(db)
+    return {'index': [st.st_ino, st.st_size, st.st_mtime]}
+
+
+def _parse_line(line):
+    """ Return the JSON in a complete line, or None. """
+
+    if not line.endswith('\n'):
+        return None
+
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def _truncate_incomplete_line(f):
+    """ Truncate the file after its last complete line, and seek to its end. """
+
+    f.seek(0, os.SEEK_END)
+    end = position = f.tell()
+    while position > 0:
+        size = min(4096, position)
+        f.seek(position - size)
+        newline = f.read(size).rfind(b'\n')
+        if newline >= 0:
+            position = position - size + newline + 1
+            break
+        position -= size
+
+    if position != end:
+        f.seek(position)
+        f.truncate()
+
+
+def _read_header(path):
+    if not exists(path):
+        return None
+
+    with open(path) as f:
+        return _parse_line(f.readline())
@@ -0,0 +1,263 @@
+""" Lookup tables derived from the indexed data, and lookups using them.
+
+The names of the C functions for methods are found by looking through all the
+method maps of a module or type, for the Python name of the method.  The
+lookup tables map the (module, Python name) and (type, Python name) directly
+to the name of the C function, and are saved with the index.
+
+The index also has an inverted index of all the Python names in the method
+maps, which is used to look for methods of modules and types, when they (or
+their method maps) haven't been indexed.
+
+A Bloom filter of all the names in the index is saved with it too, so that
+names which are not in the index are rejected without looking them up.
+
+"""
+
+from __future__ import absolute_import, print_function
+
+# Local library
+from .bloom import BloomFilter
+
+# The sections of the index whose names are in the name filter.  The names of
+# the 'names' section are the Python names of the methods, in all method maps.
+FILTER_SECTIONS = ('objects', 'modules', 'methods', 'names')
+
+
+def build_lookup_tables(data):
+    """ Add the lookup tables for methods of modules and types to the data. """
+
+    method_names = data.get('method_names', {})
+
+    module_methods = data['module_methods'] = {}
+    for name, module in data.get('modules', {}).items():
+        table = _merge_method_maps(method_names.get, module.get('method_maps', []))
+        if len(table) > 0:
+            module_methods[name] = table
+
+    type_methods = data['type_methods'] = {}
+    for name, type_ in data.get('objects', {}).items():
+        table = _merge_method_maps(method_names.get, type_.get('references', []))
+        if len(table) > 0:
+            type_methods[name] = table
+
+    data['names'] = _build_name_index(data)
+    data['name_filter'] = build_name_filter(data).to_dict()
+
+    return data
+
+
+def build_name_filter(data):
+    """ Return a Bloom filter of the names in all the sections of the data. """
+
+    return BloomFilter.for_keys(
+        _get_filter_key(section, name)
+        for section in FILTER_SECTIONS
+        for name in data.get(section, {})
+    )
+
+
+def rank_candidates(candidates, owner):
+    """ Sort the candidate C functions for a name, best match first.
+
+    Candidates from method maps of the given module or type are preferred,
+    followed by those whose method map or function is named after the owner,
+    and those from method maps that do not belong to any module or type.
+
+    """
+
+    def key(candidate):
+        owners = candidate['modules'] + candidate['types']
+        return (
+            owner in owners,
+            _is_named_after(candidate, owner),
+            len(owners) == 0,
+        )
+
+    candidates = sorted(candidates, key=lambda c: (c['function'], c['method_map']))
+    return sorted(candidates, key=key, reverse=True)
+
+
+class BaseIndex(object):
+    """ Lookups common to all the storage formats.
+
+    Formats that keep the lookup tables in memory set them as lookup_tables.
+    Otherwise, the C functions are found by looking through the method maps.
+
+    """
+
+    lookup_tables = None
+
+    # The filter of the names in the index, if the index has one.
+    name_filter = None
+
+    def close(self):
+        pass
+
+    def may_contain(self, section, name):
+        """ Return False if the section of the index definitely doesn't have
+        the name.
+
+        """
+
+        name_filter = self.name_filter
+        if name_filter is None:
+            if self.lookup_tables is None or 'name_filter' not in self.lookup_tables:
+                return True
+            name_filter = self.name_filter = BloomFilter.from_dict(
+                self.lookup_tables['name_filter']
+            )
+
+        return name is not None and _get_filter_key(section, name) in name_filter
+
+    def get_module_method(self, module_name, name):
+        """ Return the name of the C function for a method of a module. """
+
+        table = self.get_module_table(module_name)
+        if table is None:
+            return self._guess_method(name, module_name)
+
+        return table.get(name)
+
+    def get_module_table(self, module_name):
+        """ Return the C functions for the methods of a module, by name.
+
+        Returns None if the module, or its method maps were not indexed.
+
+        """
+
+        if self.lookup_tables is not None:
+            return self.lookup_tables['module_methods'].get(module_name)
+
+        module = self.get_module(module_name) or {}
+        table = _merge_method_maps(self.get_method_map, module.get('method_maps', []))
+        return table if len(table) > 0 else None
+
+    def get_name_candidates(self, name):
+        """ Return all the C functions for methods with the given name.
+
+        Each candidate is a dictionary with the name of the function, its
+        method map, and the modules and types that use the method map.
+
+        """
+
+        if self.lookup_tables is None or 'names' not in self.lookup_tables:
+            return []
+
+        return self.lookup_tables['names'].get(name, [])
+
+    def get_type_method(self, type_name, name):
+        """ Return the name of the C function for a method of a type. """
+
+        table = self.get_type_table(type_name)
+        if table is None:
+            return self._guess_method(name, type_name)
+
+        return table.get(name)
+
+    def get_type_table(self, type_name):
+        """ Return the C functions for the methods of a type, by name.
+
+        Returns None if the type, or its method maps were not indexed.
+
+        """
+
+        if self.lookup_tables is not None:
+            return self.lookup_tables['type_methods'].get(type_name)
+
+        type_ = self.get_object(type_name) or {}
+        table = _merge_method_maps(self.get_method_map, type_.get('references', []))
+        return table if len(table) > 0 else None
+
+    def _guess_method(self, name, owner):
+        """ Return the best matching C function for a name, from all maps.
+
+        A function is returned only if it is tied to the owner (by the owners
+        of its method map, or by its name), or if it is the only function for
+        the name, and its method map doesn't belong to any module or type.
+
+        """
+
+        candidates = rank_candidates(self.get_name_candidates(name), owner)
+        if len(candidates) == 0:
+            return None
+
+        best = candidates[0]
+        if _is_related(best, owner):
+            return best['function']
+
+        if len(candidates) == 1 and len(best['modules'] + best['types']) == 0:
+            return best['function']
+
+        return None
+
+
+def _build_name_index(data):
+    """ Return a mapping of Python names to the C functions for them. """
+
+    owners = {}
+    for name, module in data.get('modules', {}).items():
+        for map_name in module.get('method_maps', []):
+            owners.setdefault(map_name, ([], []))[0].append(name)
+    for name, type_ in data.get('objects', {}).items():
+        for map_name in type_.get('references', []):
+            owners.setdefault(map_name, ([], []))[1].append(name)
+
+    names = {}
+    for map_name, mapping in sorted(data.get('method_names', {}).items()):
+        modules, types = owners.get(map_name, ([], []))
+        for py_name, c_name in mapping.items():
+            names.setdefault(py_name, []).append({
+                'function': c_name,
+                'method_map': map_name,
+                'modules': sorted(modules),
+                'types': sorted(types),
+            })
+
+    return names
+
+
+def _is_related(candidate, owner):
+    """ Return True if the candidate belongs to, or is named after, the owner. """
+
+    if owner is None:
+        return False
+
+    if owner in candidate['modules'] + candidate['types']:
+        return True
+
+    return _is_named_after(candidate, owner)
+
+
+def _is_named_after(candidate, owner):
+    """ Return True if the method map or function is named after the owner.
+
+    Names are compared by whole '_'-separated words, so that short owners like
+    'io' or 're' are not found inside unrelated names like 'functools_functions'.
+
+    """
+
+    if not owner:
+        return False
+
+    owner_name = owner.lower().replace('.', '_')
+    for name in (candidate['method_map'], candidate['function']):
+        name = (name or '').lower()
+        if owner_name in name.split('_') or name.startswith(owner_name + '_'):
+            return True
+
+    return False
+
+
+def _get_filter_key(section, name):
+    return '%s:%s' % (section, name)
+
+
+def _merge_method_maps(get_method_map, map_names):
+    """ Merge the method maps, with earlier maps taking precedence. """
+
+    table = {}
+    for map_name in reversed(map_names):
+        table.update(get_method_map(map_name) or {})
+
+    return table
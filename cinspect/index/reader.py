@@ -4,96 +4,322 @@
 from __future__ import absolute_import, print_function
 
 # Standard library
-from os.path import abspath, exists
+from os import stat
+from os.path import realpath
+import threading
+import time
 
 # Local library.
 from .._types import (
     BuiltinFunction, BuiltinMethod, MethodDescriptor, Module, Type
 )
-from .serialize import get_index_path, read_index
+from .journal import get_journal_size
+from .serialize import get_index_path, open_index
+from .server import LookupClient
+from .shared import attach_shared_index
+from .stats import record_lookup, record_time
+
+# The number of objects missing from an index, that a reader remembers.
+MAX_MISSES = 4096
 
 
 class Reader(object):
-    """ A class to read indexes and get source of specific objects. """
+    """ A class to read indexes and get source of specific objects.
+
+    Objects are looked up by the lookup server, if it is running, and in the
+    index loaded by the reader, otherwise.  server is the path to the socket
+    of the server, and False to never use a server.
+
+    If shared_memory is the name of a shared memory segment with an index
+    (see `cinspect.index.shared`), objects are looked up in it, instead.
+
+    """
 
     #### 'Object' protocol ####################################################
 
-    def __init__(self, index_path=None):
-        if index_path is None:
-            index_path = get_index_path(None, only_existing=True, allow_similar=True)
-        self.index_path = abspath(index_path)
+    def __init__(self, index_path=None, memory_budget=None, server=None,
+                 shared_memory=None):
+        self.shared_memory = shared_memory
+        if shared_memory is not None:
+            index_path = None
+            server = False
+        elif index_path is None:
+            index_path = _find_index_path()
+        self.index_path = realpath(index_path) if index_path is not None else None
+        self.memory_budget = memory_budget
+        self._client = LookupClient(server) if server is not False else None
+
+        self._index = None
+        self._index_stat = None
+        self._lock = threading.Lock()
+        self._misses = set()
+        self._misses_index = None
 
     #### 'Reader' protocol ####################################################
 
     def get_source(self, obj):
         """ Return the source for the object."""
 
-        data = self._get_data(obj)
-        return data['source']
+        return self._lookup(obj, 'source')
 
     def get_file(self, obj):
         """ Return the file where the object has been defined. """
 
-        data = self._get_data(obj)
-        return data['path']
+        return self._lookup(obj, 'path')
+
+    def get_files(self, objs):
+        """ Return a mapping of the objects to the files defining them.
+
+        See `get_sources` for how the objects are looked up.
+
+        """
+
+        return self._get_data_many(objs, 'path')
+
+    def get_sources(self, objs):
+        """ Return a mapping of the objects to their sources.
+
+        All the objects are looked up in the same loaded index, grouped by
+        their module or type.  If an object couldn't be looked up, the
+        exception raised is returned as its value, instead of the source.
+
+        """
+
+        return self._get_data_many(objs, 'source')
+
+    def is_indexed(self, obj):
+        """ Return True if the object is in the index.
+
+        Lookups of objects that are not in the index return an empty source
+        and path, which are also what some indexed objects have.
+
+        """
+
+        return self._lookup(obj, 'indexed')
+
+    def reload(self):
+        """ Discard the loaded index, so that it is read again on next use. """
+
+        with self._lock:
+            self._index = None
+            self._index_stat = None
 
     #### 'Private' protocol ###################################################
 
-    def _get_data(self, obj):
-        """ Get the data for the given object. """
+    def _get_data(self, obj, index=None):
+        """ Get the data for the given object.
 
-        if not exists(self.index_path):
-            raise OSError('Index data not found at %s' % self.index_path)
+        Objects that are not in the index get a `MissingData`, with an empty
+        source and path.  These misses are remembered, until the index
+        changes, and are not looked up again.
+
+        """
+
+        if index is None:
+            index = self._get_index()
+
+        start = time.time()
+        kind = type(obj).__name__
+        misses = self._get_misses(index)
+        key = (kind, obj.module, obj.type_name, obj.name)
+        data = None
+        if key not in misses:
+            data = self._find_data(obj, index)
+            if data is None:
+                if len(misses) >= MAX_MISSES:
+                    misses.clear()
+                misses.add(key)
+
+        if data is None:
+            data = MissingData(source='', path='')
+
+        record_lookup(
+            kind, time.time() - start, not isinstance(data, MissingData),
+            index_path=self.index_path, name=obj.name
+        )
+        return data
+
+    def _get_data_many(self, objs, key):
+        """ Get the given item of the data for all the objects. """
+
+        objs = sorted(objs, key=_get_owner)
+        if self._client is not None:
+            results = self._client.lookup(self.index_path, objs, key)
+            if results is not None:
+                return dict(zip(objs, results))
 
-        indexed_data = read_index(self.index_path)
+        index = self._get_index()
+        results = {}
+        for obj in objs:
+            try:
+                results[obj] = self._get_item(self._get_data(obj, index), key)
+            except Exception as e:
+                results[obj] = e
+
+        return results
+
+    def _find_data(self, obj, index):
+        """ Look up the data for the object in the index, or return None.
+
+        Names that the filter of the index rejects are not looked up.
+
+        """
 
         name = obj.name
         type_name = obj.type_name
         module_name = obj.module
 
-        dummy_data = {'source': '', 'path': ''}
-
-
         if isinstance(obj, Type):
-            objects = indexed_data.get('objects', {})
-            data = objects.get(name, dummy_data)
+            if not index.may_contain('objects', name):
+                return None
+            data = index.get_object(name)
 
         elif isinstance(obj, Module):
-            modules = indexed_data.get('modules', {})
-            data = modules.get(name, dummy_data)
+            if not index.may_contain('modules', name):
+                return None
+            data = index.get_module(name)
 
         elif isinstance(obj, BuiltinFunction):
-            module = indexed_data.get('modules', {}).get(module_name, {})
-            # fixme: if we fail to get method_maps for the module, we could
-            # look in all the maps.
-            method_maps = module.get('method_maps', [])
-            method_names = indexed_data.get('method_names', {})
-            for mmap in method_maps:
-                name_mapping = method_names[mmap]
-                if name in name_mapping:
-                    method_name = name_mapping[name]
-                    break
-            else:
-                method_name = ''
-            data = indexed_data.get('methods', {}).get(method_name, dummy_data)
+            if not index.may_contain('names', name):
+                return None
+            method_name = index.get_module_method(module_name, name)
+            data = self._get_method_data(index, method_name)
 
         elif isinstance(obj, BuiltinMethod) or isinstance(obj, MethodDescriptor):
-            type_ = indexed_data.get('objects', {}).get(type_name, {})
-            # fixme: if we fail to get source for method from references, we
-            # could look in all the maps.
-            references = type_.get('references', [])
-            method_names = indexed_data.get('method_names', {})
-            for mmap in references:
-                if mmap in method_names:
-                    name_mapping = method_names[mmap]
-                    if name in name_mapping:
-                        method_name = name_mapping[name]
-                        break
-            else:
-                method_name = ''
-            data = indexed_data.get('methods', {}).get(method_name, dummy_data)
+            if not index.may_contain('names', name):
+                return None
+            method_name = index.get_type_method(type_name, name)
+            data = self._get_method_data(index, method_name)
 
         else:
             raise RuntimeError('Cannot get source for %s' % obj)
 
         return data
+
+    def _get_item(self, data, key):
+        """ Return the given item of the data for an object.
+
+        The 'indexed' item is True, unless the object is not in the index.
+
+        """
+
+        if key == 'indexed':
+            return not isinstance(data, MissingData)
+
+        return data[key]
+
+    def _lookup(self, obj, key):
+        """ Look up the given item of the data for the object. """
+
+        if self._client is not None:
+            results = self._client.lookup(self.index_path, [obj], key)
+            if results is not None:
+                if isinstance(results[0], Exception):
+                    raise results[0]
+                return results[0]
+
+        return self._get_item(self._get_data(obj), key)
+
+    def _get_method_data(self, index, method_name):
+        if method_name is None or not index.may_contain('methods', method_name):
+            return None
+
+        return index.get_method(method_name)
+
+    def _get_misses(self, index):
+        """ Return the objects known to be missing from the given index. """
+
+        with self._lock:
+            if self._misses_index is not index:
+                self._misses = set()
+                self._misses_index = index
+
+            return self._misses
+
+    def _get_index(self):
+        """ Return the opened index, re-opening it if the index has changed. """
+
+        if self.shared_memory is not None:
+            with self._lock:
+                if self._index is None:
+                    start = time.time()
+                    self._index = attach_shared_index(self.shared_memory)
+                    record_time(
+                        'index_load', time.time() - start,
+                        shared_memory=self.shared_memory
+                    )
+
+                return self._index
+
+        try:
+            st = stat(self.index_path)
+        except OSError:
+            raise OSError('Index data not found at %s' % self.index_path)
+
+        key = (st.st_mtime, st.st_size, get_journal_size(self.index_path))
+        with self._lock:
+            if self._index is None or self._index_stat != key:
+                # The replaced index is not closed explicitly, since other
+                # threads could still be looking up objects in it.
+                start = time.time()
+                self._index = open_index(self.index_path, self.memory_budget)
+                record_time(
+                    'index_load', time.time() - start, index_path=self.index_path
+                )
+                self._index_stat = key
+
+            return self._index
+
+
+class MissingData(dict):
+    """ The data for an object that is not in the index. """
+
+
+def _find_index_path():
+    """ Return the path to the index for the current version of Python. """
+
+    start = time.time()
+    index_path = get_index_path(None, only_existing=True, allow_similar=True)
+    record_time('path_resolution', time.time() - start, index_path=index_path)
+    return index_path
+
+
+def _get_owner(obj):
+    """ Return a sort key for the module or type an object belongs to. """
+
+    try:
+        return (type(obj).__name__, obj.module or '', obj.type_name or '')
+    except Exception:
+        return (type(obj).__name__, '', '')
+
+
+# The readers shared by all the lookups in this process, keyed by index path.
+_readers = {}
+_readers_lock = threading.Lock()
+
+
+def get_reader(index_path=None, server=None):
+    """ Return the shared reader for the index at the given path.
+
+    The index is loaded once, and is re-read only if the file on disk changes.
+    server is passed to the reader (see `Reader`), when it is created.
+
+    """
+
+    if index_path is None:
+        index_path = _find_index_path()
+    index_path = realpath(index_path)
+
+    with _readers_lock:
+        reader = _readers.get(index_path)
+        if reader is None:
+            reader = _readers[index_path] = Reader(index_path, server=server)
+
+    return reader
+
+
+def clear_cache():
+    """ Forget all the shared readers, and the indexes they have loaded. """
+
+    with _readers_lock:
+        _readers.clear()
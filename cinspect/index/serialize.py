@@ -1,34 +1,57 @@
 from __future__ import absolute_import, print_function
 
-import glob
-# fixme: it might be better to use an sqlitedb instead
 import json
-from os.path import basename, exists, expanduser, join
+from os import listdir, stat
+from os.path import (
+    basename, exists, expanduser, getsize, isdir, join, splitext
+)
 import re
 import sys
 
-from pkg_resources import parse_version
-
-
-def get_index_path(version=None, only_existing=False, allow_similar=True):
+from ._files import write_text
+from .journal import (
+    append_journal, apply_journal, needs_compaction, remove_journal
+)
+from .lookup import BaseIndex, build_lookup_tables
+from .blob import BlobIndex, is_blob_index, read_blob_index, write_blob_index
+from .sharded import ShardedIndex, read_sharded_index, write_sharded_index
+from .sqlitedb import (
+    SqliteIndex, is_sqlite_index, read_sqlite_index, write_sqlite_index
+)
+from .stats import record_bytes
+
+# The supported storage formats, in the order of preference when looking up
+# an index, and the extensions used for the index files.
+FORMATS = ('sqlite', 'sharded', 'blob', 'json')
+EXTENSIONS = {
+    'blob': '.blob', 'json': '.json', 'sharded': '.shards', 'sqlite': '.sqlite'
+}
+
+INDEX_DIR = '~/.cinspect'
+
+
+def get_index_path(version=None, only_existing=False, allow_similar=True,
+                   format=None):
     """Return the path to the index file for the given version.
 
     If only_existing is True, checks if the db file exists.  An error is raised
     if allow_similar is False.  If file doesn't exist and allow_similar is
     True, the closest matching version's db is returned.
 
+    If format is None, an existing index in any of the supported formats is
+    looked for, and the path for a JSON index is returned otherwise.
+
+    The existing indexes found are cached, until the index directory changes.
+
     """
 
     if version is None:
         version = _get_current_version()
 
-    path_ = path = expanduser(join('~/.cinspect', 'index-%s.json' % version))
-    if only_existing and not exists(path):
-       if allow_similar:
-           files = glob.glob(expanduser(join('~/.cinspect', 'index*.json')))
-           path = _get_most_similar(version, files)
-       else:
-           path = None
+    formats = FORMATS if format is None else (format,)
+    path_ = path = _get_path_for_version(version, formats[-1])
+    if only_existing:
+        path = _find_existing_index(version, formats, allow_similar)
 
     if path is None:
         raise OSError('Index path does not exist: %s' % path_)
@@ -36,6 +59,55 @@ def get_index_path(version=None, only_existing=False, allow_similar=True):
     return path
 
 
+def get_index_format(db):
+    """ Return the storage format of the index at the given path.
+
+    Existing indexes are recognized by their contents, and new ones by the
+    extension of the path.  JSON is used when neither says anything.
+
+    """
+
+    if isdir(db):
+        format = 'sharded'
+
+    elif exists(db):
+        if is_sqlite_index(db):
+            format = 'sqlite'
+        elif is_blob_index(db):
+            format = 'blob'
+        else:
+            format = 'json'
+
+    else:
+        format = _get_format(db) or 'json'
+
+    return format
+
+
+def open_index(db, memory_budget=None):
+    """ Open the index at the given path for looking up objects.
+
+    memory_budget is the approximate size (in bytes) of the data from a
+    sharded index, that is kept loaded.
+
+    """
+
+    format = get_index_format(db)
+    if format == 'sqlite':
+        index = SqliteIndex(db)
+
+    elif format == 'sharded':
+        index = ShardedIndex(db, memory_budget)
+
+    elif format == 'blob':
+        index = BlobIndex(db)
+
+    else:
+        index = JsonIndex(db)
+
+    return index
+
+
 def read_index(db):
     """ Read the index and return the data.
 
@@ -43,37 +115,149 @@ def read_index(db):
 
     """
 
-    if exists(db):
+    format = get_index_format(db)
+    if not exists(db):
+        data = {}
+
+    elif format == 'sqlite':
+        data = read_sqlite_index(db)
+
+    elif format == 'sharded':
+        data = read_sharded_index(db)
+
+    elif format == 'blob':
+        data = read_blob_index(db)
+
+    else:
         with open(db) as f:
             data = json.load(f)
-    else:
-        data = {}
+        if apply_journal(db, data):
+            build_lookup_tables(data)
 
     return data
 
 
-def write_index(db, data):
-    """ Read the index and return the data. """
+def write_index(db, data, format=None, changes=None):
+    """ Write the data to the index, in the given format.
+
+    The lookup tables derived from the data are (re)built, and written too.
+
+    changes are the changes made to the data read from the index (see
+    `cinspect.index.journal.get_changes`), if only these need to be saved.
+    The changes to JSON indexes are appended to their journal, until it needs
+    to be compacted.
+
+    """
+
+    existing_format = get_index_format(db) if exists(db) else None
+    if format is None:
+        format = get_index_format(db)
+
+    # The changes are saved only to an existing index, in the same format.
+    if changes is not None and format == existing_format:
+        if len(changes) == 0:
+            return
+
+        if format == 'json' and not needs_compaction(db):
+            append_journal(db, changes)
+            return
+
+    build_lookup_tables(data)
+
+    if format == 'sqlite':
+        write_sqlite_index(db, data)
 
-    with open(db, 'w') as f:
-        json.dump(data, f, indent=2)
+    elif format == 'sharded':
+        write_sharded_index(db, data)
+
+    elif format == 'blob':
+        write_blob_index(db, data)
+
+    elif format == 'json':
+        write_text(db, json.dumps(data, indent=2))
+        remove_journal(db)
+
+    else:
+        raise ValueError('Unknown index format: %s' % format)
+
+
+def convert_index(src, dst, format):
+    """ Convert the index at src to the given format, and save it at dst. """
+
+    write_index(dst, read_index(src), format)
+
+
+class JsonIndex(BaseIndex):
+    """ Lookups into an index, that is completely loaded into memory. """
+
+    def __init__(self, db):
+        self.data = read_index(db)
+        record_bytes(getsize(db), index_path=db)
+        if 'module_methods' not in self.data:
+            build_lookup_tables(self.data)
+        self.lookup_tables = self.data
+
+    def get_method(self, name):
+        return self.data.get('methods', {}).get(name)
+
+    def get_method_map(self, name):
+        return self.data.get('method_names', {}).get(name)
+
+    def get_module(self, name):
+        return self.data.get('modules', {}).get(name)
+
+    def get_object(self, name):
+        return self.data.get('objects', {}).get(name)
 
 
 # ### Private protocol ########################################################
 
-VERSION_RE = re.compile('index-([0-9.]+).json')
+VERSION_RE = re.compile('index-([0-9.]+)\\.(?:%s)$' % '|'.join(
+    ext[1:] for ext in sorted(EXTENSIONS.values())
+))
+
+# The existing indexes found for the lookups, and the index directory with its
+# modification time, when they were found.
+_found_indexes = {'stat': None, 'paths': {}}
+
 
 def _distance(version):
+    """ Return a sort key ranking versions by how close they are to this one.
+
+    The major version difference dominates the minor one, which dominates the
+    micro one, however large the micro numbers are.
+
+    """
+
     def key(v):
-        score = 0
-        for i, (m, n) in enumerate(zip(v[-2::-1], version[-2::-1])):
-            score += 10**i * abs(int(m)-int(n))
-        if v[-1] != version[-1]:
-            score += 0.5
-        return score
+        return tuple(abs(m - n) for m, n in zip(_pad(v), _pad(version)))
     return key
 
 
+def _find_existing_index(version, formats, allow_similar):
+    """ Return the path to an existing index for the version, or None. """
+
+    global _found_indexes
+
+    index_dir = expanduser(INDEX_DIR)
+    try:
+        mtime = stat(index_dir).st_mtime
+    except OSError:
+        return None
+
+    found = _found_indexes
+    if found['stat'] != (index_dir, mtime):
+        found = _found_indexes = {'stat': (index_dir, mtime), 'paths': {}}
+
+    key = (version, formats, allow_similar)
+    if key not in found['paths']:
+        found['paths'][key] = _search_index_dir(
+            index_dir, version, formats, allow_similar
+        )
+
+    return found['paths'][key]
+
+
 def _get_current_version():
     version = '{}.{}.{}'.format(
         sys.version_info.major, sys.version_info.minor, sys.version_info.micro
@@ -81,6 +265,16 @@ def _get_current_version():
     return version
 
 
+def _get_format(name):
+    extensions = dict((ext, format) for (format, ext) in EXTENSIONS.items())
+    return extensions.get(splitext(name)[1].lower())
+
+
+def _get_path_for_version(version, format):
+    name = 'index-%s%s' % (version, EXTENSIONS[format])
+    return expanduser(join(INDEX_DIR, name))
+
+
 def _get_most_similar(version, names):
     if len(names) == 0:
         path = None
@@ -90,7 +284,7 @@ def _get_most_similar(version, names):
 
     else:
         versions = [_get_version(name) for name in names]
-        v_min = min(versions, key=_distance(parse_version(version)))
+        v_min = min(versions, key=_distance(_parse_version(version)))
         path = names[versions.index(v_min)]
 
     return path
@@ -100,4 +294,35 @@ def _get_version(path):
     v = VERSION_RE.search(basename(path))
     if v is None:
         raise RuntimeError('Invalid index name: Should be index-x.y.z.json')
-    return parse_version(v.groups()[0])
+    return _parse_version(v.groups()[0])
+
+
+def _pad(version, length=3):
+    return tuple(version) + (0,) * (length - len(version))
+
+
+def _parse_version(version):
+    return tuple(int(part) for part in version.split('.') if part.isdigit())
+
+
+def _search_index_dir(index_dir, version, formats, allow_similar):
+    """ Return the path to the best matching index in the directory. """
+
+    names = [
+        name for name in sorted(listdir(index_dir))
+        if VERSION_RE.search(name) is not None
+        and splitext(name)[1] in [EXTENSIONS[format] for format in formats]
+    ]
+
+    for format in formats:
+        name = basename(_get_path_for_version(version, format))
+        if name in names:
+            return join(index_dir, name)
+
+    if not allow_similar:
+        return None
+
+    # Among indexes of equally similar versions, prefer the earlier formats.
+    names.sort(key=lambda name: formats.index(_get_format(name)))
+    path = _get_most_similar(version, names)
+    return join(index_dir, path) if path is not None else None
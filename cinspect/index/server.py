@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+""" A server that looks up objects in indexes, for other processes.
+
+Usage: cinspect-server [--socket PATH] [index ...]
+
+The server keeps the indexes loaded, and answers lookups over a Unix domain
+socket, so that all the interpreters on a host share one loaded copy of each
+index.  Readers use the server when it is running, and load the indexes
+themselves when it isn't.
+
+The protocol is one JSON object per line, in both directions.  A request has
+the key of the data to look up ('source', 'path' or 'indexed'), the path to
+the index, and descriptions of the objects (see `cinspect._types.describe`).
+
+    {"key": "source", "index_path": "...", "objects": [{"kind": ...}, ...]}
+
+The response has a result for each of the objects, in the same order.  Each
+result is either {"value": ...} or {"error": [exception name, message]}.
+
+"""
+
+from __future__ import absolute_import, print_function
+
+# Standard library
+import json
+import os
+from os.path import exists, expanduser
+import socket
+import sys
+import threading
+import time
+if sys.version_info.major > 2:
+    import socketserver
+else:
+    import SocketServer as socketserver
+
+# Local library
+from .._types import describe, from_description
+
+SOCKET_PATH = '~/.cinspect/server.sock'
+
+# Seconds to wait, before trying to connect again to a server that was down.
+RETRY_INTERVAL = 5.0
+
+# Exceptions that are raised again in the clients, instead of a RuntimeError.
+EXCEPTIONS = dict(
+    (cls.__name__, cls)
+    for cls in (IOError, KeyError, NotImplementedError, OSError, RuntimeError)
+)
+
+
+class LookupServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """ A server answering lookups with the readers for the indexes. """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path=None):
+        if socket_path is None:
+            socket_path = expanduser(SOCKET_PATH)
+
+        if exists(socket_path):
+            if is_server_running(socket_path):
+                raise RuntimeError('Server already running at %s' % socket_path)
+            os.unlink(socket_path)
+
+        socketserver.UnixStreamServer.__init__(self, socket_path, LookupHandler)
+        os.chmod(socket_path, 0o600)
+
+        self._readers = {}
+        self._readers_lock = threading.Lock()
+
+    def get_reader(self, index_path):
+        """ Return the reader for the given index. """
+
+        # Avoid a circular import, since readers are clients of the server.
+        from .reader import Reader
+
+        with self._readers_lock:
+            reader = self._readers.get(index_path)
+            if reader is None:
+                reader = self._readers[index_path] = Reader(index_path, server=False)
+
+        return reader
+
+    def lookup(self, request):
+        """ Return the response for a request. """
+
+        reader = self.get_reader(request['index_path'])
+        index = reader._get_index()
+        results = []
+        for description in request['objects']:
+            try:
+                data = reader._get_data(from_description(description), index)
+                results.append({'value': reader._get_item(data, request['key'])})
+            except Exception as e:
+                results.append({'error': [type(e).__name__, str(e)]})
+
+        return {'results': results}
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        if exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+class LookupHandler(socketserver.StreamRequestHandler):
+    """ Answers the requests on a connection, one line at a time. """
+
+    def handle(self):
+        for line in iter(self.rfile.readline, b''):
+            try:
+                response = self.server.lookup(json.loads(line.decode('utf8')))
+            except Exception as e:
+                response = {'error': [type(e).__name__, str(e)]}
+
+            self.wfile.write(json.dumps(response).encode('utf8') + b'\n')
+            self.wfile.flush()
+
+
+class LookupClient(object):
+    """ A connection to the lookup server.
+
+    Lookups return None, if the server isn't running.
+
+    """
+
+    def __init__(self, socket_path=None):
+        if socket_path is None:
+            socket_path = expanduser(SOCKET_PATH)
+
+        self.socket_path = socket_path
+        self._file = None
+        self._socket = None
+        self._lock = threading.Lock()
+        self._retry_at = 0
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+    def lookup(self, index_path, objs, key):
+        """ Return the results for the objects, or None if not connected.
+
+        Each result is the value looked up, or the exception raised.
+
+        """
+
+        try:
+            objects = [describe(obj) for obj in objs]
+        except Exception:
+            return None
+
+        request = {'key': key, 'index_path': index_path, 'objects': objects}
+        response = self._request(request)
+        if response is None:
+            return None
+
+        if 'error' in response:
+            return [_get_exception(response['error'])] * len(objects)
+
+        return [
+            _get_exception(result['error']) if 'error' in result else result['value']
+            for result in response['results']
+        ]
+
+    def _connect(self):
+        if not hasattr(socket, 'AF_UNIX') or not exists(self.socket_path):
+            return False
+
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._socket.connect(self.socket_path)
+        except socket.error:
+            self._socket.close()
+            self._socket = None
+            return False
+
+        self._file = self._socket.makefile('rwb')
+        return True
+
+    def _disconnect(self):
+        if self._socket is not None:
+            self._file.close()
+            self._socket.close()
+        self._file = self._socket = None
+
+    def _request(self, request):
+        """ Send a request to the server, and return the response. """
+
+        line = json.dumps(request).encode('utf8') + b'\n'
+        with self._lock:
+            if self._socket is None:
+                if time.time() < self._retry_at:
+                    return None
+                if not self._connect():
+                    self._retry_at = time.time() + RETRY_INTERVAL
+                    return None
+
+            try:
+                self._file.write(line)
+                self._file.flush()
+                response = self._file.readline()
+            except socket.error:
+                response = b''
+
+            if len(response) == 0:
+                # The server went away, fall back to the local lookups.
+                self._disconnect()
+                self._retry_at = time.time() + RETRY_INTERVAL
+                return None
+
+        return json.loads(response.decode('utf8'))
+
+
+def is_server_running(socket_path=None):
+    """ Return True if a server is accepting connections at the socket. """
+
+    client = LookupClient(socket_path)
+    try:
+        with client._lock:
+            return client._connect()
+    finally:
+        client.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Serve lookups in indexes, to other processes.',
+    )
+    parser.add_argument(
+        'indexes', nargs='*', help='paths of indexes to load on startup'
+    )
+    parser.add_argument(
+        '--socket', default=expanduser(SOCKET_PATH),
+        help='path of the Unix domain socket to listen on'
+    )
+
+    args = parser.parse_args()
+    server = LookupServer(args.socket)
+    for path in args.indexes:
+        server.get_reader(os.path.realpath(path))._get_index()
+
+    print('Serving lookups at %s' % args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _get_exception(error):
+    name, message = error
+    return EXCEPTIONS.get(name, RuntimeError)(message)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+""" Storing indexes as a directory of per-file shards.
+
+The index directory contains a small manifest, that maps the names of the
+objects, methods and modules to the shards they are saved in, and a shard for
+each source file that was indexed.  Only the shards required for a lookup are
+loaded, and the loaded shards are kept around only as long as they fit in a
+memory budget.
+
+    index-x.y.z.shards/
+        manifest.json
+        shards/<file name>-<hash>.json
+
+"""
+
+from __future__ import absolute_import, print_function
+
+# Standard library
+from collections import OrderedDict
+from hashlib import md5
+import json
+import os
+from os.path import basename, exists, getsize, isdir, join, splitext
+import threading
+
+# Local library
+from ._files import write_text
+from .lookup import BaseIndex
+from .stats import record_bytes
+
+MANIFEST = 'manifest.json'
+SHARDS_DIR = 'shards'
+
+# The sections of the index whose entries are saved in the shards.
+SHARDED_SECTIONS = ('objects', 'methods', 'modules')
+
+# The default size (in bytes, of the shard files) of the shards kept loaded.
+SHARD_MEMORY_BUDGET = 64 * 1024 * 1024
+
+
+def is_sharded_index(db):
+    """ Return True if the given path is a sharded index directory. """
+
+    return isdir(db) and exists(join(db, MANIFEST))
+
+
+def read_sharded_index(db):
+    """ Read the complete index from all the shards, as a dictionary.
+
+    Returns an empty dictionary if the directory has no index in it, yet.
+
+    """
+
+    if not is_sharded_index(db):
+        return {}
+
+    manifest = _read_json(join(db, MANIFEST))
+    data = dict(
+        (key, value) for (key, value) in manifest.items()
+        if key not in SHARDED_SECTIONS and key != 'shards'
+    )
+    for section in SHARDED_SECTIONS:
+        data[section] = {}
+
+    for shard_id in manifest['shards']:
+        shard = _read_json(_get_shard_path(db, shard_id))
+        for section in SHARDED_SECTIONS:
+            data[section].update(shard.get(section, {}))
+
+    return data
+
+
+def write_sharded_index(db, data):
+    """ Write the index data as shards, into the given directory.
+
+    Shards are named using a hash of their contents, and the manifest is
+    replaced only after all the new shards are written.  Readers always see a
+    consistent index, and unchanged shards are not rewritten.
+
+    """
+
+    shards = {}
+    for section in SHARDED_SECTIONS:
+        for name, entry in data.get(section, {}).items():
+            path = entry.get('path') or ''
+            shards.setdefault(path, {}).setdefault(section, {})[name] = entry
+
+    manifest = dict(
+        (key, value) for (key, value) in data.items()
+        if key not in SHARDED_SECTIONS
+    )
+    manifest['shards'] = {}
+    for section in SHARDED_SECTIONS:
+        manifest[section] = {}
+
+    shards_dir = join(db, SHARDS_DIR)
+    if not exists(shards_dir):
+        os.makedirs(shards_dir)
+
+    for path, shard in sorted(shards.items()):
+        text = json.dumps(shard, sort_keys=True)
+        shard_id = _get_shard_id(path, text)
+        shard_path = _get_shard_path(db, shard_id)
+        if not exists(shard_path):
+            write_text(shard_path, text)
+        manifest['shards'][shard_id] = len(text)
+        for section, entries in shard.items():
+            for name in entries:
+                manifest[section][name] = shard_id
+
+    write_text(join(db, MANIFEST), json.dumps(manifest, sort_keys=True))
+
+    for name in os.listdir(shards_dir):
+        if splitext(name)[0] not in manifest['shards']:
+            os.unlink(join(shards_dir, name))
+
+
+class ShardedIndex(BaseIndex):
+    """ Lookups into a sharded index, loading only the required shards. """
+
+    def __init__(self, db, memory_budget=None):
+        if memory_budget is None:
+            memory_budget = SHARD_MEMORY_BUDGET
+
+        self.db = db
+        self.memory_budget = memory_budget
+        self.manifest = _read_json(join(db, MANIFEST))
+        record_bytes(getsize(join(db, MANIFEST)), index_path=db)
+        if 'module_methods' in self.manifest:
+            self.lookup_tables = self.manifest
+
+        self._shards = OrderedDict()
+        self._shards_size = 0
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self._shards.clear()
+            self._shards_size = 0
+
+    def get_method(self, name):
+        return self._get_entry('methods', name)
+
+    def get_method_map(self, name):
+        return self.manifest.get('method_names', {}).get(name)
+
+    def get_module(self, name):
+        return self._get_entry('modules', name)
+
+    def get_object(self, name):
+        return self._get_entry('objects', name)
+
+    def _get_entry(self, section, name):
+        """ Return an entry from the shard it is saved in. """
+
+        shard_id = self.manifest.get(section, {}).get(name)
+        if shard_id is None:
+            return None
+
+        shard = self._get_shard(shard_id)
+        return shard.get(section, {}).get(name)
+
+    def _get_shard(self, shard_id):
+        """ Return the shard with the given id, loading it if required. """
+
+        with self._lock:
+            shard = self._shards.pop(shard_id, None)
+            if shard is not None:
+                self._shards[shard_id] = shard
+                return shard
+
+        try:
+            shard = _read_json(_get_shard_path(self.db, shard_id))
+        except (IOError, OSError):
+            # The shard was removed by a writer, after the manifest was read.
+            return {}
+
+        size = self.manifest['shards'].get(shard_id, 0)
+        record_bytes(size, index_path=self.db, shard=shard_id)
+        with self._lock:
+            if shard_id not in self._shards:
+                self._shards[shard_id] = shard
+                self._shards_size += size
+            while self._shards_size > self.memory_budget and len(self._shards) > 1:
+                evicted, _ = self._shards.popitem(last=False)
+                self._shards_size -= self.manifest['shards'].get(evicted, 0)
+
+        return shard
+
+
+def _get_shard_id(path, text):
+    name = splitext(basename(path))[0] or 'unknown'
+    return '%s-%s' % (name, md5(text.encode('utf8')).hexdigest()[:16])
+
+
+def _get_shard_path(db, shard_id):
+    return join(db, SHARDS_DIR, '%s.json' % shard_id)
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
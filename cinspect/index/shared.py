@@ -0,0 +1,266 @@
+""" Sharing an index between processes, using shared memory.
+
+The index is loaded once, and packed into a shared memory segment, in a
+read-only layout where everything is addressed by offsets.  Other processes
+(like the workers of a multiprocessing pool) attach to the segment, and look
+up objects in it directly, without copying or parsing the index.
+
+    header | table directory | tables of sorted records | strings
+
+Each record of a table has the (offset, length) of its key and its value in
+the strings.  Lookups are binary searches over the records of a table.  The
+values for objects, methods and modules are their metadata as JSON, with the
+span of their source in the strings, instead of the source.
+
+NOTE: Shared memory is only available in Python 3.8 and later.
+
+"""
+
+from __future__ import absolute_import, print_function
+
+# Standard library
+import json
+import struct
+import sys
+
+# Local library
+from .blob import SOURCE_SECTIONS, BlobEntry, _SourceBlob
+from .lookup import BaseIndex, build_lookup_tables
+from .serialize import read_index
+from .stats import record_bytes
+
+PACKED_MAGIC = b'CINSPECT-PACK\x00\x01\x00'
+HEADER = struct.Struct('>I')
+TABLE = struct.Struct('>16sQI')
+RECORD = struct.Struct('>QIQI')
+
+# The tables with JSON values, besides the ones with sources.
+JSON_TABLES = ('method_names', 'names')
+
+# The lookup tables, keyed by owner and Python name.
+OWNER_TABLES = ('module_methods', 'type_methods')
+OWNER_SEPARATOR = b'\x00'
+
+
+def attach_shared_index(name):
+    """ Return the index packed into the shared memory segment with the name.
+
+    """
+
+    shared_memory = _attach(name)
+    return PackedIndex(shared_memory.buf, shared_memory)
+
+
+def create_shared_index(index_path, name=None):
+    """ Pack the index into a new shared memory segment, and return it.
+
+    The segment stays around until it is unlinked, by the process that created
+    it (which should also keep it open, as long as it is being used).
+
+    """
+
+    from multiprocessing.shared_memory import SharedMemory
+
+    packed = pack_index(read_index(index_path))
+    shared_memory = SharedMemory(name=name, create=True, size=len(packed))
+    shared_memory.buf[:len(packed)] = packed
+    return shared_memory
+
+
+def pack_index(data):
+    """ Return the index data packed into bytes, in the read-only layout. """
+
+    if 'module_methods' not in data:
+        build_lookup_tables(data)
+
+    blob = _SourceBlob()
+    tables = {}
+    for section in SOURCE_SECTIONS:
+        records = tables[section] = []
+        for name, entry in data.get(section, {}).items():
+            entry = dict(entry)
+            entry['span'] = blob.add(
+                entry.pop('source'), entry.get('path'), entry.get('extent'),
+                is_file=(section == 'modules')
+            )
+            records.append((name.encode('utf8'), entry))
+
+    for section in JSON_TABLES:
+        tables[section] = [
+            (name.encode('utf8'), value)
+            for (name, value) in data.get(section, {}).items()
+        ]
+
+    for section in OWNER_TABLES:
+        tables[section] = [
+            (owner.encode('utf8') + OWNER_SEPARATOR + py_name.encode('utf8'), c_name)
+            for (owner, mapping) in data.get(section, {}).items()
+            for (py_name, c_name) in mapping.items()
+        ]
+
+    names = sorted(tables)
+    strings_offset = (
+        len(PACKED_MAGIC) + HEADER.size + TABLE.size * len(names) +
+        RECORD.size * sum(len(tables[name]) for name in names)
+    )
+    # The sources are at the start of the strings, so that their spans are
+    # relative to it.
+    strings = bytearray(b''.join(blob.sources))
+
+    def add_string(text):
+        offset = strings_offset + len(strings)
+        strings.extend(text)
+        return offset, len(text)
+
+    directory = []
+    records = []
+    offset = strings_offset - RECORD.size * sum(len(tables[name]) for name in names)
+    for name in names:
+        directory.append(TABLE.pack(name.encode('utf8'), offset, len(tables[name])))
+        for key, value in sorted(tables[name], key=lambda record: record[0]):
+            if name in SOURCE_SECTIONS:
+                start, length = value['span']
+                value['span'] = [strings_offset + start, length]
+
+            if name in OWNER_TABLES:
+                value = value.encode('utf8')
+            else:
+                value = json.dumps(value, sort_keys=True).encode('utf8')
+
+            records.append(RECORD.pack(*(add_string(key) + add_string(value))))
+            offset += RECORD.size
+
+    return b''.join(
+        [PACKED_MAGIC, HEADER.pack(len(names))] + directory + records +
+        [bytes(strings)]
+    )
+
+
+class PackedIndex(BaseIndex):
+    """ Lookups into an index packed into a buffer, without copying it. """
+
+    def __init__(self, buffer, owner=None):
+        if bytes(buffer[:len(PACKED_MAGIC)]) != PACKED_MAGIC:
+            raise RuntimeError('Not a packed index')
+
+        self._buffer = buffer
+        # Keep the object that owns the buffer (shared memory) from closing.
+        self._owner = owner
+
+        start = len(PACKED_MAGIC)
+        count, = HEADER.unpack_from(buffer, start)
+        start += HEADER.size
+        self._tables = {}
+        for i in range(count):
+            name, offset, size = TABLE.unpack_from(buffer, start + i * TABLE.size)
+            self._tables[name.rstrip(b'\x00').decode('utf8')] = (offset, size)
+
+    def close(self):
+        self._buffer = None
+        if self._owner is not None:
+            self._owner.close()
+            self._owner = None
+
+    def get_method(self, name):
+        return self._get_entry('methods', name)
+
+    def get_method_map(self, name):
+        return self._get_json('method_names', name)
+
+    def get_module(self, name):
+        return self._get_entry('modules', name)
+
+    def get_module_method(self, module_name, name):
+        return self._get_owner_method('module_methods', module_name, name)
+
+    def get_name_candidates(self, name):
+        return self._get_json('names', name) or []
+
+    def get_object(self, name):
+        return self._get_entry('objects', name)
+
+    def get_source(self, span):
+        """ Return the source at the given (offset, length) in the buffer. """
+
+        offset, length = span
+        record_bytes(length)
+        return bytes(self._buffer[offset:offset + length]).decode('utf8')
+
+    def get_type_method(self, type_name, name):
+        return self._get_owner_method('type_methods', type_name, name)
+
+    def _get_entry(self, table, name):
+        entry = self._get_json(table, name)
+        return BlobEntry(self, entry) if entry is not None else None
+
+    def _get_json(self, table, name):
+        if name is None:
+            return None
+
+        value = self._get_value(table, name.encode('utf8'))
+        return json.loads(value.decode('utf8')) if value is not None else None
+
+    def _get_key(self, record):
+        key_offset, key_length, _, _ = RECORD.unpack_from(self._buffer, record)
+        return bytes(self._buffer[key_offset:key_offset + key_length])
+
+    def _get_owner_method(self, table, owner, name):
+        if owner is None:
+            return self._guess_method(name, owner)
+
+        prefix = owner.encode('utf8') + OWNER_SEPARATOR
+        value = self._get_value(table, prefix + name.encode('utf8'))
+        if value is not None:
+            return value.decode('utf8')
+
+        record = self._search(table, prefix)
+        if record is None or not self._get_key(record).startswith(prefix):
+            # The owner (or its method maps) wasn't indexed.
+            return self._guess_method(name, owner)
+
+        return None
+
+    def _get_value(self, table, key):
+        """ Return the value for the key in the table, or None. """
+
+        record = self._search(table, key)
+        if record is None or self._get_key(record) != key:
+            return None
+
+        _, _, value_offset, value_length = RECORD.unpack_from(self._buffer, record)
+        return bytes(self._buffer[value_offset:value_offset + value_length])
+
+    def _search(self, table, key):
+        """ Return the offset of the first record with a key >= the given key.
+
+        """
+
+        if table not in self._tables:
+            return None
+
+        offset, count = self._tables[table]
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_key(offset + middle * RECORD.size) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        return offset + low * RECORD.size if low < count else None
+
+
+def _attach(name):
+    """ Attach to an existing shared memory segment. """
+
+    from multiprocessing.shared_memory import SharedMemory
+
+    if sys.version_info[:2] >= (3, 13):
+        return SharedMemory(name=name, track=False)
+
+    shared_memory = SharedMemory(name=name)
+    # Only the process creating the segment should unlink it, but attaching
+    # registers it with the resource tracker, which unlinks it at exit.
+    from multiprocessing import resource_tracker
+    resource_tracker.unregister(shared_memory._name, 'shared_memory')
+    return shared_memory
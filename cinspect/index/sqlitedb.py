@@ -0,0 +1,391 @@
+""" Storing indexes in an SQLite database.
+
+Unlike the JSON indexes, which need to be loaded completely into memory, an
+SQLite index is queried for each object being looked up.  Opening an index is
+cheap, and the memory used doesn't grow with the size of the index.
+
+"""
+
+from __future__ import absolute_import, print_function
+
+# Standard library
+import json
+import sqlite3
+import threading
+
+# Local library
+from ._files import get_temp_path, replace_file
+from .bloom import BloomFilter
+from .lookup import BaseIndex
+from .stats import record_bytes
+
+SQLITE_MAGIC = b'SQLite format 3\x00'
+
+SCHEMA = """
+CREATE TABLE objects (
+    name TEXT PRIMARY KEY, path TEXT, source TEXT, refs TEXT
+);
+CREATE TABLE methods (
+    name TEXT PRIMARY KEY, path TEXT, source TEXT
+);
+CREATE TABLE modules (
+    name TEXT PRIMARY KEY, path TEXT, source TEXT, method_maps TEXT
+);
+CREATE TABLE method_names (
+    map_name TEXT, py_name TEXT, c_name TEXT,
+    PRIMARY KEY (map_name, py_name)
+);
+CREATE INDEX method_names_py_name ON method_names (py_name);
+CREATE TABLE hashes (
+    path TEXT PRIMARY KEY, hash TEXT
+);
+CREATE TABLE file_stats (
+    path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER
+);
+CREATE TABLE files (
+    path TEXT PRIMARY KEY, entries TEXT
+);
+CREATE TABLE failures (
+    path TEXT PRIMARY KEY, failure TEXT
+);
+CREATE TABLE module_methods (
+    module TEXT, py_name TEXT, c_name TEXT,
+    PRIMARY KEY (module, py_name)
+);
+CREATE TABLE type_methods (
+    type_name TEXT, py_name TEXT, c_name TEXT,
+    PRIMARY KEY (type_name, py_name)
+);
+CREATE TABLE names (
+    py_name TEXT, c_name TEXT, method_map TEXT, modules TEXT, types TEXT
+);
+CREATE INDEX names_py_name ON names (py_name);
+CREATE TABLE filters (
+    name TEXT PRIMARY KEY, data TEXT
+);
+"""
+
+# The lookup tables, saved as (owner, Python name, C function name) rows.
+LOOKUP_TABLES = ('module_methods', 'type_methods')
+
+
+def is_sqlite_index(db):
+    """ Return True if the file at the given path is an SQLite database. """
+
+    with open(db, 'rb') as f:
+        header = f.read(len(SQLITE_MAGIC))
+
+    return header == SQLITE_MAGIC
+
+
+def read_sqlite_index(db):
+    """ Read the complete index from the database, as a dictionary. """
+
+    connection = sqlite3.connect(db)
+    try:
+        data = {
+            'objects': dict(
+                (name, {'path': path, 'source': source, 'references': json.loads(refs)})
+                for (name, path, source, refs)
+                in connection.execute('SELECT name, path, source, refs FROM objects')
+            ),
+            'methods': dict(
+                (name, {'path': path, 'source': source})
+                for (name, path, source)
+                in connection.execute('SELECT name, path, source FROM methods')
+            ),
+            'modules': dict(
+                (name, {'path': path, 'source': source, 'method_maps': json.loads(maps)})
+                for (name, path, source, maps)
+                in connection.execute('SELECT name, path, source, method_maps FROM modules')
+            ),
+            'hashes': dict(connection.execute('SELECT path, hash FROM hashes')),
+        }
+        if _has_table(connection, 'file_stats'):
+            query = 'SELECT path, size, mtime_ns, inode FROM file_stats'
+            file_stats = dict(
+                (row[0], list(row[1:])) for row in connection.execute(query)
+            )
+            if len(file_stats) > 0:
+                data['file_stats'] = file_stats
+
+        if _has_table(connection, 'files'):
+            files = dict(
+                (path, json.loads(entries))
+                for (path, entries) in connection.execute('SELECT * FROM files')
+            )
+            if len(files) > 0:
+                data['files'] = files
+
+        if _has_table(connection, 'failures'):
+            failures = dict(
+                (path, json.loads(failure))
+                for (path, failure) in connection.execute('SELECT * FROM failures')
+            )
+            if len(failures) > 0:
+                data['failures'] = failures
+
+        method_names = data['method_names'] = {}
+        query = 'SELECT map_name, py_name, c_name FROM method_names'
+        for map_name, py_name, c_name in connection.execute(query):
+            method_names.setdefault(map_name, {})[py_name] = c_name
+
+        for table in LOOKUP_TABLES:
+            if _has_table(connection, table):
+                rows = data[table] = {}
+                for owner, py_name, c_name in connection.execute('SELECT * FROM %s' % table):
+                    rows.setdefault(owner, {})[py_name] = c_name
+
+        if _has_table(connection, 'names'):
+            names = data['names'] = {}
+            for row in connection.execute('SELECT * FROM names ORDER BY rowid'):
+                names.setdefault(row[0], []).append(_get_candidate(row))
+
+        name_filter = _get_filter(connection, 'name_filter')
+        if name_filter is not None:
+            data['name_filter'] = name_filter
+
+    finally:
+        connection.close()
+
+    return data
+
+
+def write_sqlite_index(db, data):
+    """ Write the index data to a new database at the given path.
+
+    The database is written to a temporary file, which then replaces any
+    existing index, so that readers never see a partially written index.
+
+    """
+
+    temp_db = get_temp_path(db)
+
+    connection = sqlite3.connect(temp_db)
+    try:
+        with connection:
+            connection.executescript(SCHEMA)
+            connection.executemany(
+                'INSERT INTO objects VALUES (?, ?, ?, ?)',
+                (
+                    (name, obj['path'], obj['source'], json.dumps(obj.get('references', [])))
+                    for (name, obj) in data.get('objects', {}).items()
+                )
+            )
+            connection.executemany(
+                'INSERT INTO methods VALUES (?, ?, ?)',
+                (
+                    (name, method['path'], method['source'])
+                    for (name, method) in data.get('methods', {}).items()
+                )
+            )
+            connection.executemany(
+                'INSERT INTO modules VALUES (?, ?, ?, ?)',
+                (
+                    (name, module['path'], module['source'],
+                     json.dumps(module.get('method_maps', [])))
+                    for (name, module) in data.get('modules', {}).items()
+                )
+            )
+            connection.executemany(
+                'INSERT INTO method_names VALUES (?, ?, ?)',
+                (
+                    (map_name, py_name, c_name)
+                    for (map_name, mapping) in data.get('method_names', {}).items()
+                    for (py_name, c_name) in mapping.items()
+                )
+            )
+            connection.executemany(
+                'INSERT INTO hashes VALUES (?, ?)', data.get('hashes', {}).items()
+            )
+            connection.executemany(
+                'INSERT INTO file_stats VALUES (?, ?, ?, ?)',
+                (
+                    [path] + list(stat)
+                    for (path, stat) in data.get('file_stats', {}).items()
+                )
+            )
+            connection.executemany(
+                'INSERT INTO files VALUES (?, ?)',
+                (
+                    (path, json.dumps(entries, sort_keys=True))
+                    for (path, entries) in data.get('files', {}).items()
+                )
+            )
+            connection.executemany(
+                'INSERT INTO failures VALUES (?, ?)',
+                (
+                    (path, json.dumps(failure, sort_keys=True))
+                    for (path, failure) in data.get('failures', {}).items()
+                )
+            )
+            for table in LOOKUP_TABLES:
+                connection.executemany(
+                    'INSERT INTO %s VALUES (?, ?, ?)' % table,
+                    (
+                        (owner, py_name, c_name)
+                        for (owner, mapping) in data.get(table, {}).items()
+                        for (py_name, c_name) in mapping.items()
+                    )
+                )
+            connection.executemany(
+                'INSERT INTO names VALUES (?, ?, ?, ?, ?)',
+                (
+                    (py_name, candidate['function'], candidate['method_map'],
+                     json.dumps(candidate['modules']), json.dumps(candidate['types']))
+                    for (py_name, candidates) in sorted(data.get('names', {}).items())
+                    for candidate in candidates
+                )
+            )
+            if 'name_filter' in data:
+                connection.execute(
+                    'INSERT INTO filters VALUES (?, ?)',
+                    ('name_filter', json.dumps(data['name_filter']))
+                )
+    finally:
+        connection.close()
+
+    replace_file(temp_db, db)
+
+
+class SqliteIndex(BaseIndex):
+    """ Lookups into an index stored in an SQLite database. """
+
+    def __init__(self, db):
+        self._connection = sqlite3.connect(db, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._has_lookup_tables = all(
+            _has_table(self._connection, table) for table in LOOKUP_TABLES
+        )
+        self._has_name_index = _has_table(self._connection, 'names')
+        name_filter = _get_filter(self._connection, 'name_filter')
+        if name_filter is not None:
+            self.name_filter = BloomFilter.from_dict(name_filter)
+
+    def close(self):
+        self._connection.close()
+
+    def get_method(self, name):
+        row = self._query_entry(
+            'SELECT path, source FROM methods WHERE name = ?', name
+        )
+        if row is None:
+            return None
+
+        return {'path': row[0], 'source': row[1]}
+
+    def get_method_map(self, name):
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT py_name, c_name FROM method_names WHERE map_name = ?',
+                (name,)
+            ).fetchall()
+
+        return dict(rows) if len(rows) > 0 else None
+
+    def get_module(self, name):
+        row = self._query_entry(
+            'SELECT path, source, method_maps FROM modules WHERE name = ?', name
+        )
+        if row is None:
+            return None
+
+        return {'path': row[0], 'source': row[1], 'method_maps': json.loads(row[2])}
+
+    def get_module_method(self, module_name, name):
+        if not self._has_lookup_tables:
+            return super(SqliteIndex, self).get_module_method(module_name, name)
+
+        return self._get_owner_method('module_methods', 'module', module_name, name)
+
+    def get_name_candidates(self, name):
+        if not self._has_name_index:
+            return []
+
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT * FROM names WHERE py_name = ? ORDER BY rowid', (name,)
+            ).fetchall()
+
+        return [_get_candidate(row) for row in rows]
+
+    def get_object(self, name):
+        row = self._query_entry(
+            'SELECT path, source, refs FROM objects WHERE name = ?', name
+        )
+        if row is None:
+            return None
+
+        return {'path': row[0], 'source': row[1], 'references': json.loads(row[2])}
+
+    def get_type_method(self, type_name, name):
+        if not self._has_lookup_tables:
+            return super(SqliteIndex, self).get_type_method(type_name, name)
+
+        return self._get_owner_method('type_methods', 'type_name', type_name, name)
+
+    def _get_owner_method(self, table, owner_column, owner, name):
+        """ Return the C function for a method, from the given lookup table. """
+
+        row = self._query_one(
+            'SELECT c_name FROM %s WHERE %s = ? AND py_name = ?' % (table, owner_column),
+            owner, name
+        )
+        if row is not None:
+            return row[0]
+
+        row = self._query_one(
+            'SELECT 1 FROM %s WHERE %s = ? LIMIT 1' % (table, owner_column), owner
+        )
+        if row is None:
+            # The owner (or its method maps) wasn't indexed.
+            return self._guess_method(name, owner)
+
+        return None
+
+    def _query_entry(self, query, name):
+        """ Return the row for an entry, recording the size of its texts. """
+
+        row = self._query_one(query, name)
+        if row is not None:
+            record_bytes(sum(len(value or '') for value in row))
+
+        return row
+
+    def _query_one(self, query, *args):
+        with self._lock:
+            return self._connection.execute(query, args).fetchone()
+
+
+def _get_candidate(row):
+    """ Return a candidate for a name, from a row of the names table. """
+
+    _, c_name, method_map, modules, types = row
+    return {
+        'function': c_name,
+        'method_map': method_map,
+        'modules': json.loads(modules),
+        'types': json.loads(types),
+    }
+
+
+def _get_filter(connection, name):
+    """ Return the description of the filter with the given name, or None. """
+
+    if not _has_table(connection, 'filters'):
+        return None
+
+    row = connection.execute(
+        'SELECT data FROM filters WHERE name = ?', (name,)
+    ).fetchone()
+    return json.loads(row[0]) if row is not None else None
+
+
+def _has_table(connection, name):
+    """ Return True if the database has a table with the given name. """
+
+    row = connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (name,)
+    ).fetchone()
+    return row is not None
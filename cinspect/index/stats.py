@@ -0,0 +1,114 @@
+""" Statistics of the lookups in indexes, and of loading them.
+
+The readers and the indexes record events here, as they happen:
+
+    path_resolution  finding the path of the index, for the current version
+    index_load       opening (and for some formats, loading) an index
+    bytes_loaded     data read from the files of an index, into memory
+    lookup           looking up an object, by the kind of the object
+
+`get_stats` returns the totals of the events so far, and the hooks added with
+`add_hook` are called with each event.  All events are also logged to the
+'cinspect' logger, at the DEBUG level.
+
+"""
+
+from __future__ import absolute_import, print_function
+
+# Standard library
+import copy
+import logging
+import threading
+
+logger = logging.getLogger('cinspect')
+
+
+def _get_empty_stats():
+    return {
+        'path_resolution': {'count': 0, 'time': 0.0},
+        'index_load': {'count': 0, 'time': 0.0},
+        'bytes_loaded': 0,
+        'lookups': {},
+    }
+
+
+_hooks = []
+_lock = threading.Lock()
+_stats = _get_empty_stats()
+
+
+def add_hook(hook):
+    """ Call the hook with each event, as hook(event, info).
+
+    info is a dictionary with the details of the event, like the time it took.
+
+    """
+
+    with _lock:
+        _hooks.append(hook)
+
+
+def remove_hook(hook):
+    with _lock:
+        _hooks.remove(hook)
+
+
+def get_stats():
+    """ Return the totals of all the events, since the last reset. """
+
+    with _lock:
+        return copy.deepcopy(_stats)
+
+
+def reset_stats():
+    global _stats
+
+    with _lock:
+        _stats = _get_empty_stats()
+
+
+def record_bytes(size, **info):
+    """ Record that the given number of bytes was read from an index. """
+
+    with _lock:
+        _stats['bytes_loaded'] += size
+
+    info['bytes'] = size
+    _notify('bytes_loaded', info)
+
+
+def record_lookup(kind, time, hit, **info):
+    """ Record the lookup of an object of the given kind, and its result. """
+
+    with _lock:
+        lookups = _stats['lookups'].get(kind)
+        if lookups is None:
+            lookups = _stats['lookups'][kind] = {
+                'count': 0, 'hits': 0, 'misses': 0, 'time': 0.0
+            }
+        lookups['count'] += 1
+        lookups['hits' if hit else 'misses'] += 1
+        lookups['time'] += time
+
+    info.update(kind=kind, time=time, hit=hit)
+    _notify('lookup', info)
+
+
+def record_time(event, time, **info):
+    """ Record an event that took the given time, in seconds. """
+
+    with _lock:
+        totals = _stats[event]
+        totals['count'] += 1
+        totals['time'] += time
+
+    info['time'] = time
+    _notify(event, info)
+
+
+def _notify(event, info):
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('%s: %r', event, info)
+
+    for hook in list(_hooks):
+        hook(event, info)
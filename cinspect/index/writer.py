@@ -7,10 +7,25 @@ The library looks up the C files in the library and indexes them, so that
 cinspect can use those indexes obtain the source code.
 
 The indexes actually save the full (required) source, and not references of the
-extent of the definition.  The source files can be removed, once indexed.
+extent of the definition.  The source files can be removed, once indexed.  (The
+byte extent of functions and types is saved too, so that the blob indexes can
+store their source as a part of the text of the file.)
 
 The indexer saves a hash (md5?) of the files, so that the indexing can be run
-any number of times to detect any changes in the file, and re-index them.
+any number of times to detect any changes in the file, and re-index them.  The
+size, modification time and inode of the files are saved too, and only the
+files whose stat changed are hashed again (unless verifying all the hashes).
+
+The index also saves the names of the entries added by each file.  When a file
+is re-indexed, its old entries are replaced by the new ones, and the entries
+of files that were removed from a directory are removed when it is re-indexed.
+
+Files that couldn't be parsed are recorded with their hash, the clang
+arguments and their errors, and are not parsed again until one of these
+changes (unless retrying the failed files).
+
+The headers included by all the files (Python.h) are precompiled once, and the
+precompiled header is reused for parsing every file.
 
 """
 
@@ -22,7 +37,8 @@ if sys.version_info.major > 2:
 
 # Standard library
 from hashlib import md5
-from os import makedirs, walk
+from multiprocessing import Pool
+from os import makedirs, stat, unlink, walk
 from os.path import (
     abspath, dirname, exists, expanduser, isdir, join, splitext
 )
@@ -32,8 +48,32 @@ import pprint
 import cinspect.vendor.clang.cindex as ci
 
 # Local library
-from .serialize import _get_current_version, get_index_path, read_index, write_index
-from cinspect.clang_utils import can_find_clang_headers, get_libclang_headers
+from ._files import get_temp_path, replace_file
+from .journal import get_changes, snapshot
+from .serialize import (
+    FORMATS, INDEX_DIR, _get_current_version, get_index_format,
+    get_index_path, read_index, write_index
+)
+from cinspect.clang_utils import find_clang_headers
+
+# The sections of the index with entries added by the indexed files.
+FILE_SECTIONS = ('objects', 'methods', 'method_names', 'modules')
+
+# The headers included by all the files, that are precompiled, and where the
+# precompiled headers are saved (keyed by the clang arguments).
+PCH_HEADERS = ('Python.h',)
+PCH_DIR = join(INDEX_DIR, 'pch')
+
+# The number of errors saved, for a file that couldn't be parsed.
+MAX_DIAGNOSTICS = 5
+
+
+class ParseError(RuntimeError):
+    """ Raised when a file couldn't be parsed, without errors. """
+
+    def __init__(self, diagnostics):
+        super(ParseError, self).__init__('There were parse errors')
+        self.diagnostics = diagnostics
 
 
 class Writer(object):
@@ -41,7 +81,9 @@ class Writer(object):
 
     #### 'Object' protocol ####################################################
 
-    def __init__(self, index_path, clang_args=None, verbose=False):
+    def __init__(self, index_path, clang_args=None, verbose=False, format=None,
+                 jobs=1, verify=False, main_file_only=False, pch=True,
+                 retry_failed=False):
         if clang_args == None:
             clang_args = []
         if verbose:
@@ -49,6 +91,18 @@ class Writer(object):
 
         self.clang_args = clang_args
         self.verbose = verbose
+        self.format = format
+        self.jobs = jobs
+        self.verify = verify
+        self.main_file_only = main_file_only
+        self.retry_failed = retry_failed
+        # True to build a precompiled header, or the path to one, or False.
+        self.pch = pch
+        self._pch = None
+        # The clang index shared by all the translation units.
+        self._clang_index = None
+        # The contents of the files of the translation unit being indexed.
+        self._sources = {}
         self.index_path = abspath(index_path)
         if not exists(dirname(self.index_path)):
             makedirs(dirname(self.index_path))
@@ -70,46 +124,162 @@ class Writer(object):
 
         else:
             data = read_index(self.index_path)
+            original = snapshot(data)
             self._update_file_in_index(path, data)
-            write_index(self.index_path, data)
+            self._write_changes(data, original)
 
     #### 'Private' protocol ###################################################
 
     def _get_code_from_cursor(self, cursor):
         """ Return a string with the code, given a cursor object. """
 
-        start, end = cursor.extent.start.offset, cursor.extent.end.offset
+        start, end = self._get_extent(cursor)
 
         file = cursor.location.file
         path = file.name if file is not None else cursor.translation_unit.spelling
 
-        with open(path) as f:
-            f.read(start)
-            text = self._make_unicode(f.read(end-start+1))
+        contents, text = self._get_source(path)
+        if len(text) == len(contents):
+            # One byte per character, so the offsets are the same in the text.
+            return text[start:end]
+
+        return self._make_unicode(contents[start:end])
+
+    def _build_precompiled_header(self):
+        """ Return the path to a precompiled header for PCH_HEADERS, built
+        with the clang arguments, or None if it couldn't be built.
+
+        A header built by an earlier run, with the same arguments, is reused.
+
+        """
+
+        key = md5(repr((self._get_args_key(), PCH_HEADERS))).hexdigest()
+        directory = expanduser(PCH_DIR)
+        path = join(directory, '%s.pch' % key)
+        if exists(path):
+            return path
+
+        if not exists(directory):
+            makedirs(directory)
+        header = join(directory, '%s.h' % key)
+        with open(header, 'w') as f:
+            f.write(''.join('#include <%s>\n' % name for name in PCH_HEADERS))
+
+        try:
+            tu = self._get_clang_index().parse(
+                header, args=['-x', 'c-header'] + self.clang_args
+            )
+            if len(self._get_errors(tu)) > 0:
+                return None
+            temp_path = get_temp_path(path)
+            tu.save(temp_path)
+            replace_file(temp_path, path)
+
+        except (ci.TranslationUnitLoadError, ci.TranslationUnitSaveError):
+            return None
+
+        return path
+
+    def _format_diagnostic(self, diagnostic):
+        location = diagnostic.location
+        path = location.file.name if location.file is not None else ''
+        return '%s:%d: %s' % (path, location.line, diagnostic.spelling)
+
+    def _get_args_key(self):
+        """ Return a hash of the clang arguments used for parsing files. """
+
+        args = [arg for arg in self.clang_args if arg != '-v']
+        return md5(repr(args)).hexdigest()
+
+    def _get_clang_index(self):
+        """ Return the clang index shared by all the translation units. """
 
-        return text
+        if self._clang_index is None:
+            self._clang_index = ci.Index.create()
+
+        return self._clang_index
+
+    def _get_extent(self, cursor):
+        """ Return the (start, end) byte offsets of the code of a cursor, in
+        its file.
+
+        """
+
+        return [cursor.extent.start.offset, cursor.extent.end.offset + 1]
 
     def _get_cursor_for_file(self, path):
         """ Returns a cursor object, given the path to a file.
 
-        Raises a RuntimeError if the file couldn't be parsed, without errors.
+        A file that can't be parsed with the precompiled header is parsed
+        once more without it.  Raises a ParseError if the file couldn't be
+        parsed, without errors.
 
         """
 
-        index = ci.Index.create()
-        tu = index.parse(path, args=self.clang_args)
-        diagnostics = [
-            diagnostic for diagnostic in list(tu.diagnostics)
-            if diagnostic.severity > 2
-        ]
+        pch = self._get_precompiled_header()
+        tu, diagnostics = self._parse_translation_unit(path, pch)
+
+        if pch is not None and len(diagnostics) > 0:
+            if any('precompiled header' in d.spelling for d in diagnostics):
+                # The headers changed since it was built, or it can't be used.
+                if self.verbose:
+                    print('Not using precompiled header %s' % pch)
+                if self.pch is True and exists(pch):
+                    unlink(pch)
+                self.pch = False
+
+            elif self.verbose:
+                print('Parsing %s again, without precompiled header' % path)
+
+            tu, diagnostics = self._parse_translation_unit(path, None)
 
         if len(diagnostics) > 0:
             if self.verbose:
                 pprint.pprint(diagnostics)
-            raise RuntimeError('There were parse errors')
+            raise ParseError(
+                [self._format_diagnostic(d) for d in diagnostics[:MAX_DIAGNOSTICS]]
+            )
 
         return tu
 
+    def _get_changes(self, path, data):
+        """ Return the hash and the stat of a file, if it changed since it
+        was indexed, or None.
+
+        Files whose stat hasn't changed are not hashed, unless verifying.
+
+        """
+
+        hashes = data.setdefault('hashes', {})
+        file_stats = data.setdefault('file_stats', {})
+        current_stat = self._get_file_stat(path)
+        if not self.verify and path in hashes and file_stats.get(path) == current_stat:
+            return None
+
+        current_hash = self._get_file_hash(path)
+        if path in hashes and current_hash == hashes[path]:
+            # Only the stat changed, like when a file is touched.
+            file_stats[path] = current_stat
+            return None
+
+        return current_hash, current_stat
+
+    def _get_errors(self, tu):
+        """ Return the diagnostics of a translation unit, that are errors. """
+
+        return [
+            diagnostic for diagnostic in list(tu.diagnostics)
+            if diagnostic.severity > 2
+        ]
+
+    def _get_failure_key(self):
+        """ Return a hash of the clang arguments and the precompiled header
+        option, that files which couldn't be parsed were parsed with.
+
+        """
+
+        return md5(repr((self._get_args_key(), self.pch))).hexdigest()
+
     def _get_file_hash(self, path):
         """ Return the hash of a file. """
 
@@ -118,20 +288,68 @@ class Writer(object):
 
         return h.hexdigest()
 
-    def _index_file(self, path, data):
-        """ Index the sources for all the objects and methods. """
+    def _get_file_stat(self, path):
+        """ Return the size, modification time (in ns) and inode of a file. """
 
-        tu = self._get_cursor_for_file(path)
-        self._indexing_visitor(tu.cursor, data, path)
+        st = stat(path)
+        mtime_ns = getattr(st, 'st_mtime_ns', None)
+        if mtime_ns is None:
+            mtime_ns = int(st.st_mtime * 10 ** 9)
+
+        return [st.st_size, mtime_ns, st.st_ino]
+
+    def _get_files_in_dir(self, path):
+        """ Return the paths of all the C files in a directory tree, in the
+        order they are indexed.
+
+        """
+
+        paths = []
+        for dirpath, dirnames, filenames in walk(expanduser(path)):
+            dirnames.sort()
+            # fixme: additional argument to ignore files?
+            for fname in sorted(filenames):
+                if self._is_c_file(fname):
+                    paths.append(join(dirpath, fname))
+
+        return paths
+
+    def _get_precompiled_header(self):
+        """ Return the path to the precompiled header to parse files with, or
+        None.  The header is built once, when first needed.
+
+        """
+
+        if self.pch is False:
+            return None
+
+        if self.pch is not True:
+            return self.pch
+
+        if self._pch is None:
+            self._pch = self._build_precompiled_header() or False
+
+        return self._pch or None
+
+    def _get_source(self, path):
+        """ Return the contents of a file, and its text.
 
-    def _index_files_in_dir(self, data, dirname, fnames):
-        """ The function we pass on to the directory tree walk function. """
+        Each file is read and decoded only once, for a translation unit.
 
-        # fixme: additional argument to ignore files?
-        for fname in sorted(fnames):
-            if self._is_c_file(fname):
-                path = join(dirname, fname)
-                self._update_file_in_index(path, data)
+        """
+
+        source = self._sources.get(path)
+        if source is None:
+            with open(path, 'rb') as f:
+                contents = f.read()
+            source = self._sources[path] = (contents, self._make_unicode(contents))
+
+        return source
+
+    def _index_file(self, path, data):
+        """ Index the sources for all the objects and methods. """
+
+        self._replace_file_entries(path, data, self._parse_file(path))
 
     def _indexing_visitor(self, cursor, data, path):
         """ Visits all nodes and returns a mapping of various kinds of definitions.
@@ -143,28 +361,48 @@ class Writer(object):
         methods = data.setdefault('methods', {})
         modules = data.setdefault('modules', {})
 
+        # The children are listed only once, for classifying the cursor and
+        # visiting them.
+        children = list(cursor.get_children())
 
         if self._is_function(cursor):
             methods.update(self._parse_function(cursor, path))
 
-        elif self._is_py_method_def(cursor):
-            method_names.update(self._parse_py_method_def(cursor))
+        elif self._is_py_method_def(cursor, children):
+            method_names.update(self._parse_py_method_def(cursor, children))
 
-        elif self._is_py_type_object(cursor):
-            objects.update(self._parse_py_type_object(cursor, path))
+        elif self._is_py_type_object(cursor, children):
+            objects.update(self._parse_py_type_object(cursor, path, children))
 
         elif self._is_py_init_module(cursor):
             modules.update(self._parse_py_init_module(cursor, path))
 
-        elif self._is_py_module_def(cursor):
-            modules.update(self._parse_py_module_def(cursor, path))
+        elif self._is_py_module_def(cursor, children):
+            modules.update(self._parse_py_module_def(cursor, path, children))
 
         else:
             # We don't care about any other types of nodes (yet)
             pass
 
-        for child in cursor.get_children():
-            self._indexing_visitor(child, data, path)
+        for child in children:
+            if self._should_visit(child, cursor, path):
+                self._indexing_visitor(child, data, path)
+
+    def _is_failed_file(self, path, data, file_hash):
+        """ Return True if the file couldn't be parsed the last time, and it
+        (or the clang arguments) haven't changed since.
+
+        """
+
+        if self.retry_failed:
+            return False
+
+        failure = data.get('failures', {}).get(path)
+        return (
+            failure is not None and
+            failure['hash'] == file_hash and
+            failure['args'] == self._get_failure_key()
+        )
 
     def _is_c_file(self, path):
         return splitext(path)[-1].lower() == '.c'
@@ -179,11 +417,12 @@ class Writer(object):
 
         return False
 
-    def _is_py_method_def(self, cursor):
+    def _is_py_method_def(self, cursor, children=None):
         if cursor.kind != ci.CursorKind.VAR_DECL:
             return False
 
-        children = list(cursor.get_children())
+        if children is None:
+            children = list(cursor.get_children())
 
         if len(children) > 1 and children[0].displayname == 'PyMethodDef':
             if children[1].kind == ci.CursorKind.INIT_LIST_EXPR:
@@ -191,11 +430,12 @@ class Writer(object):
 
         return False
 
-    def _is_py_module_def(self, cursor):
+    def _is_py_module_def(self, cursor, children=None):
         if cursor.kind != ci.CursorKind.VAR_DECL:
             return False
 
-        children = list(cursor.get_children())
+        if children is None:
+            children = list(cursor.get_children())
 
         if len(children) > 1 and 'PyModuleDef' in children[0].spelling:
             if children[1].kind == ci.CursorKind.INIT_LIST_EXPR:
@@ -203,11 +443,12 @@ class Writer(object):
 
         return False
 
-    def _is_py_type_object(self, cursor):
+    def _is_py_type_object(self, cursor, children=None):
         if cursor.kind != ci.CursorKind.VAR_DECL:
             return False
 
-        children = list(cursor.get_children())
+        if children is None:
+            children = list(cursor.get_children())
         if len(children) > 1 and children[0].displayname == 'PyTypeObject':
             return True
 
@@ -228,6 +469,7 @@ class Writer(object):
             cursor.spelling: {
                 'source': self._get_code_from_cursor(cursor),
                 'path': path,
+                'extent': self._get_extent(cursor),
             }
         }
         return data
@@ -257,8 +499,10 @@ class Writer(object):
 
         return {}
 
-    def _parse_py_module_def(self, cursor, path):
-        value = list(cursor.get_children())[1]
+    def _parse_py_module_def(self, cursor, path, children=None):
+        if children is None:
+            children = list(cursor.get_children())
+        value = children[1]
         definition = self._python_object_from_cursor_by_kind(value)
         name = definition[1]
         method_map_name = None if len(definition) < 5 else definition[4]
@@ -274,8 +518,10 @@ class Writer(object):
 
         return {}
 
-    def _parse_py_method_def(self, cursor):
-        value = list(cursor.get_children())[1]
+    def _parse_py_method_def(self, cursor, children=None):
+        if children is None:
+            children = list(cursor.get_children())
+        value = children[1]
         method_map = {}
 
         for entry in self._python_object_from_cursor_by_kind(value):
@@ -290,8 +536,9 @@ class Writer(object):
 
         return {cursor.displayname: method_map}
 
-    def _parse_py_type_object(self, cursor, path):
-        children = list(cursor.get_children())
+    def _parse_py_type_object(self, cursor, path, children=None):
+        if children is None:
+            children = list(cursor.get_children())
         parsed_definition = self._python_object_from_cursor_by_kind(children[1])
         if parsed_definition is not None and len(parsed_definition) >= 4:
             # PyObject_HEAD_INIT definition changed in Py3
@@ -310,6 +557,7 @@ class Writer(object):
                     name[1:-1]: {
                         'source': self._get_code_from_cursor(cursor),
                         'path': path,
+                        'extent': self._get_extent(cursor),
                         'references': references
                     }
                 }
@@ -318,6 +566,32 @@ class Writer(object):
         return {}
 
     # fixme: this isn't really returning a python object for everything..
+    def _parse_file(self, path):
+        """ Return the entries for all the objects and methods in a file. """
+
+        tu = self._get_cursor_for_file(path)
+        file_data = {}
+        try:
+            self._indexing_visitor(tu.cursor, file_data, path)
+        finally:
+            self._sources.clear()
+
+        return file_data
+
+    def _parse_translation_unit(self, path, pch):
+        """ Parse a file, with the precompiled header if any.
+
+        Returns the translation unit and its errors.
+
+        """
+
+        args = self.clang_args
+        if pch is not None:
+            args = args + ['-include-pch', pch]
+
+        tu = self._get_clang_index().parse(path, args=args)
+        return tu, self._get_errors(tu)
+
     def _python_object_from_cursor_by_kind(self, cursor):
         """ Return a Python object based on the kind of the cursor.
 
@@ -360,25 +634,240 @@ class Writer(object):
 
         return obj
 
+    def _remove_file_entries(self, path, data):
+        """ Remove the entries added by a file, from the index. """
+
+        files = data.setdefault('files', {})
+        for section, names in files.pop(path, {}).items():
+            entries = data.get(section, {})
+            for name in names:
+                if name not in entries:
+                    continue
+
+                if section == 'method_names':
+                    # Method maps don't have a path, and the ones with the
+                    # same name in other files are kept.
+                    if any(name in f.get(section, []) for f in files.values()):
+                        continue
+
+                elif entries[name].get('path') != path:
+                    # Replaced by an entry from another file.
+                    continue
+
+                del entries[name]
+
+    def _remove_missing_files(self, path, data):
+        """ Remove the files in a directory that no longer exist, from the
+        index.
+
+        """
+
+        root = join(path, '')
+        indexed = (
+            set(data.get('hashes', {})) | set(data.get('files', {})) |
+            set(data.get('failures', {}))
+        )
+        for file_path in sorted(indexed):
+            if file_path.startswith(root) and not exists(file_path):
+                if self.verbose:
+                    print('Removing %s' % file_path)
+                self._remove_file_entries(file_path, data)
+                data.get('hashes', {}).pop(file_path, None)
+                data.get('file_stats', {}).pop(file_path, None)
+                data.get('failures', {}).pop(file_path, None)
+
+    def _record_failure(self, path, data, file_hash, diagnostics):
+        """ Record that the file couldn't be parsed, with its errors. """
+
+        if self.verbose:
+            print('Could not parse %s' % path)
+
+        data.setdefault('failures', {})[path] = {
+            'hash': file_hash,
+            'args': self._get_failure_key(),
+            'diagnostics': diagnostics,
+        }
+
+    def _record_success(self, path, data, changes):
+        """ Record the hash and the stat of a file that was indexed. """
+
+        data['hashes'][path], data['file_stats'][path] = changes
+        data.get('failures', {}).pop(path, None)
+
+    def _replace_file_entries(self, path, data, file_data):
+        """ Replace the entries added by a file, with its new entries. """
+
+        self._remove_file_entries(path, data)
+        for section, entries in file_data.items():
+            data.setdefault(section, {}).update(entries)
+
+        data['files'][path] = dict(
+            (section, sorted(file_data[section]))
+            for section in FILE_SECTIONS
+            if len(file_data.get(section, {})) > 0
+        )
+
+    def _should_visit(self, cursor, parent, path):
+        """ Return True if the cursor (a child of the parent) should be
+        visited, when indexing the file at the given path.
+
+        When indexing only the main file, declarations from included files
+        are skipped, and so are the bodies of functions, except the ones
+        that could be initializing a module (with Py_InitModule).
+
+        """
+
+        if not self.main_file_only:
+            return True
+
+        file = cursor.location.file
+        if file is not None and file.name != path:
+            return False
+
+        if parent.kind == ci.CursorKind.FUNCTION_DECL:
+            if cursor.kind == ci.CursorKind.COMPOUND_STMT:
+                return 'init' in parent.spelling.lower()
+
+        return True
+
     def _update_dir_in_index(self, path):
         """ Walks through the directory, and indexes all the files in it. """
 
         data = read_index(self.index_path)
-        for dirpath, _, filenames in walk(expanduser(path)):
-            self._index_files_in_dir(data, dirpath, filenames)
-        write_index(self.index_path, data)
+        original = snapshot(data)
+        paths = self._get_files_in_dir(path)
+        if self.jobs > 1:
+            self._update_files_in_parallel(paths, data)
+        else:
+            for file_path in paths:
+                self._update_file_in_index(file_path, data)
+        self._remove_missing_files(expanduser(path), data)
+        self._write_changes(data, original)
 
     def _update_file_in_index(self, path, data):
-        hashes = data.setdefault('hashes', {})
-        current_hash = self._get_file_hash(path)
-        if path not in hashes or current_hash != hashes[path]:
-            try:
-               self._index_file(path, data)
-            except RuntimeError:
-                if self.verbose:
-                    print('Could not parse %s' % path)
-            else:
-                hashes[path] = current_hash
+        changes = self._get_changes(path, data)
+        if changes is None or self._is_failed_file(path, data, changes[0]):
+            return
+
+        try:
+            self._index_file(path, data)
+        except ParseError as e:
+            self._record_failure(path, data, changes[0], e.diagnostics)
+        else:
+            self._record_success(path, data, changes)
+
+    def _update_files_in_parallel(self, paths, data):
+        """ Index the files that changed, in a pool of worker processes.
+
+        Each worker parses a file into a separate dictionary, and these are
+        merged in the order of the files, so that the index is the same as
+        the one created by indexing the files one after another.
+
+        """
+
+        changed = []
+        for path in paths:
+            changes = self._get_changes(path, data)
+            if changes is not None and not self._is_failed_file(path, data, changes[0]):
+                changed.append((path, changes))
+
+        # The precompiled header is built before starting the workers, and is
+        # shared by all of them.
+        pch = self._get_precompiled_header() or False
+        pool = Pool(
+            self.jobs, _init_worker,
+            (self.index_path, self.clang_args, self.verbose, self.main_file_only,
+             pch)
+        )
+        try:
+            results = pool.imap(
+                _index_file_in_worker, [path for (path, _) in changed]
+            )
+            for i, (file_data, diagnostics) in enumerate(results):
+                path, changes = changed[i]
+                if file_data is None:
+                    self._record_failure(path, data, changes[0], diagnostics)
+                    continue
+
+                self._replace_file_entries(path, data, file_data)
+                self._record_success(path, data, changes)
+
+        finally:
+            pool.close()
+            pool.join()
+
+    def _write_changes(self, data, original):
+        """ Save the changes made to the data read from the index. """
+
+        changes = get_changes(original, data)
+        write_index(self.index_path, data, self.format, changes)
+
+
+# The writer used by each worker process, when indexing in parallel.
+_worker = None
+
+
+def _init_worker(index_path, clang_args, verbose, main_file_only, pch):
+    global _worker
+
+    # The clang arguments already have -v, if the output is verbose.
+    _worker = Writer(
+        index_path, clang_args=list(clang_args), main_file_only=main_file_only,
+        pch=pch
+    )
+    _worker.verbose = verbose
+
+
+def _index_file_in_worker(path):
+    """ Index a file into a new dictionary.
+
+    Returns the dictionary and None, or None and the errors, if the file
+    couldn't be parsed.
+
+    """
+
+    try:
+        return _worker._parse_file(path), None
+    except ParseError as e:
+        return None, e.diagnostics
+
+
+def format_failures(data):
+    """ Return a report of the files in the index that couldn't be parsed,
+    with their first few errors.
+
+    """
+
+    failures = data.get('failures', {})
+    lines = ['%d file(s) could not be parsed' % len(failures)]
+    for path in sorted(failures):
+        lines.append('')
+        lines.append(path)
+        lines.extend(
+            '    %s' % diagnostic for diagnostic in failures[path]['diagnostics']
+        )
+
+    return '\n'.join(lines)
+
+
+def _get_output_path(version, format):
+    """ Return the path of the index to write, for the version.
+
+    Without a format, the existing index for the version is updated (in its
+    own format), since readers look for the indexes in all the formats.
+
+    """
+
+    if format is None:
+        try:
+            return get_index_path(
+                version=version, only_existing=True, allow_similar=False
+            )
+        except OSError:
+            format = 'json'
+
+    return get_index_path(version=version, format=format)
+
 
 def main():
     import argparse
@@ -396,23 +885,64 @@ def main():
         help='version of the source code being indexed'
     )
     parser.add_argument('-c', '--libclang', help='dynamic library location')
+    parser.add_argument(
+        '--format', choices=FORMATS,
+        help='storage format of the index (default: the format of the '
+        'existing index for the version, or json)'
+    )
+    parser.add_argument(
+        '-j', '--jobs', default=1, type=int,
+        help='number of processes parsing files in parallel'
+    )
+    parser.add_argument(
+        '--verify', action='store_true',
+        help='hash all the files, even if their size and mtime are unchanged'
+    )
+    parser.add_argument(
+        '--main-file-only', action='store_true',
+        help='skip included files, and the bodies of functions (faster)'
+    )
+    parser.add_argument(
+        '--pch', help='precompiled header to use, instead of building one'
+    )
+    parser.add_argument(
+        '--no-pch', action='store_true',
+        help='parse the headers again for every file, without precompiling'
+    )
+    parser.add_argument(
+        '--retry-failed', action='store_true',
+        help='parse the files that failed to parse earlier, even if unchanged'
+    )
+    parser.add_argument(
+        '--report-failures', action='store_true',
+        help='list the files that could not be parsed, and their errors'
+    )
 
     args, clang_args  = parser.parse_known_args()
     if args.libclang is not None:
         ci.Config.set_library_file(args.libclang)
-    if not can_find_clang_headers(clang_args):
-        print('could not find clang headers, guessing')
-        clang_args = get_libclang_headers() + clang_args
-        print('our guess:')
-        pprint.pprint(clang_args)
+    headers = find_clang_headers(clang_args)
+    if len(headers) > 0:
+        print('could not find clang headers, using:')
+        pprint.pprint(headers)
+        clang_args = headers + clang_args
 
     # fixme: auto detect headers based on package?
-    index_path = get_index_path(version=args.version)
-    writer = Writer(index_path=index_path, clang_args=clang_args, verbose=args.verbose)
+    index_path = _get_output_path(args.version, args.format)
+    writer = Writer(
+        index_path=index_path, clang_args=clang_args, verbose=args.verbose,
+        format=get_index_format(index_path), jobs=args.jobs, verify=args.verify,
+        main_file_only=args.main_file_only,
+        pch=False if args.no_pch else (args.pch or True),
+        retry_failed=args.retry_failed
+    )
 
     for path in args.paths:
         writer.create(abspath(expanduser(path)))
 
+    if args.report_failures:
+        print(format_failures(read_index(index_path)))
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,17 @@
+""" Helpers shared by the tests. """
+
+from __future__ import absolute_import, print_function
+
+# Standard library
+from os.path import abspath, dirname, join
+
+# The directory with the hello module, and an index of it.
+DATA = join(dirname(abspath(__file__)), 'data')
+
+
+class Function(object):
+    """ A stand-in for a builtin function of the hello module. """
+
+    def __init__(self, module, name):
+        self.__module__ = module
+        self.__name__ = name
@@ -0,0 +1,127 @@
+from __future__ import absolute_import, print_function
+
+import sys
+import unittest
+if sys.version_info[:2] < (3, 5):
+    raise unittest.SkipTest('Coroutines are only supported in Py3.5+')
+
+# Standard library
+import asyncio
+from os.path import join
+from shutil import copy, rmtree
+import tempfile
+import threading
+
+# Local library
+from cinspect import agetfile, agetsource, getfile, getsource
+from cinspect._types import BuiltinFunction, Module
+import cinspect.aio
+import cinspect.index.reader
+from cinspect.index.reader import clear_cache, get_reader
+from cinspect.index.server import LookupServer
+from cinspect.tests import DATA, Function
+
+
+class TestAsyncLookups(unittest.TestCase):
+
+    #### 'TestCase' protocol ##################################################
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.index_path = join(self.temp_dir, 'DB')
+        copy(join(DATA, 'DB'), self.index_path)
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        clear_cache()
+        # The lookups use the shared reader, which doesn't use a server.
+        get_reader(self.index_path, server=False)
+
+    def tearDown(self):
+        clear_cache()
+        asyncio.set_event_loop(None)
+        self.loop.close()
+        rmtree(self.temp_dir)
+
+    #### Tests ################################################################
+
+    def test_should_get_same_results_as_blocking_lookups(self):
+        # Given
+        objects = [
+            BuiltinFunction(Function('hello', 'say_hello')),
+            Module(Function(None, 'hello')),
+            unittest.main,
+        ]
+
+        for obj in objects:
+            # When
+            source = self._run(agetsource(obj, self.index_path))
+            path = self._run(agetfile(obj, self.index_path))
+
+            # Then
+            self.assertEqual(getsource(obj, self.index_path), source)
+            self.assertEqual(getfile(obj, self.index_path), path)
+
+    def test_should_load_index_once_for_concurrent_lookups(self):
+        # Given
+        loads = []
+        open_index = cinspect.index.reader.open_index
+
+        def counting_open_index(*args):
+            loads.append(args)
+            return open_index(*args)
+
+        obj = BuiltinFunction(Function('hello', 'say_hello'))
+        lookups = [agetsource(obj, self.index_path) for _ in range(10)]
+
+        # When
+        cinspect.index.reader.open_index = counting_open_index
+        try:
+            sources = self._run(asyncio.gather(*lookups))
+        finally:
+            cinspect.index.reader.open_index = open_index
+
+        # Then
+        self.assertEqual(1, len(loads))
+        self.assertEqual(1, len(set(sources)))
+        self.assertIn('say_hello', sources[0])
+        self.assertEqual({}, cinspect.aio._loads)
+
+    def test_should_look_up_in_server_when_running(self):
+        # Given
+        socket_path = join(self.temp_dir, 'server.sock')
+        server = LookupServer(socket_path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        clear_cache()
+        reader = get_reader(self.index_path, server=socket_path)
+        objects = [
+            BuiltinFunction(Function('hello', 'say_hello')),
+            Module(Function(None, 'hello')),
+        ]
+
+        try:
+            # When
+            source = self._run(agetsource(objects[0], self.index_path))
+            sources = self._run(
+                cinspect.aio.AsyncReader(self.index_path).get_sources(objects)
+            )
+
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        # Then
+        self.assertIn('say_hello', source)
+        self.assertEqual(source, sources[objects[0]])
+        self.assertIn(reader.index_path, server._readers)
+        self.assertIsNone(reader._index)
+
+    #### Private protocol #####################################################
+
+    def _run(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+
+if __name__ == '__main__':
+    unittest.main()
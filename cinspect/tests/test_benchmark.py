@@ -0,0 +1,71 @@
+from __future__ import absolute_import, print_function
+
+# Standard library
+from os.path import join
+import sys
+from shutil import rmtree
+import tempfile
+import unittest
+
+# Local library
+from cinspect._types import from_description
+from cinspect.index.benchmark import (
+    KINDS, generate_index, get_descriptions, run_benchmarks
+)
+from cinspect.index.reader import Reader
+from cinspect.index.serialize import FORMATS, write_index
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_should_generate_index_of_given_size(self):
+        # When
+        data = generate_index(1000)
+
+        # Then
+        self.assertEqual(10, len(data['modules']))
+        self.assertEqual(100, len(data['objects']))
+        self.assertEqual(890, len(data['methods']))
+        self.assertEqual(110, len(data['method_names']))
+
+    def test_should_find_all_sampled_objects(self):
+        # Given
+        temp_dir = tempfile.mkdtemp()
+        path = join(temp_dir, 'index.json')
+        data = generate_index(500)
+        write_index(path, data, 'json')
+        found, missing = get_descriptions(data, 20)
+        reader = Reader(path, server=False)
+
+        try:
+            for kind in KINDS:
+                for description in found[kind]:
+                    # When/Then
+                    self.assertTrue(reader.is_indexed(from_description(description)))
+
+            for description in missing:
+                self.assertFalse(reader.is_indexed(from_description(description)))
+
+        finally:
+            rmtree(temp_dir)
+
+    def test_should_benchmark_all_formats(self):
+        # When
+        results = run_benchmarks(sizes=[300], lookups=10)
+
+        # Then
+        self.assertEqual(
+            list(FORMATS), [result['format'] for result in results['results']]
+        )
+        for result in results['results']:
+            self.assertEqual(300, result['entries'])
+            self.assertEqual(set(KINDS), set(result['lookups']))
+            self.assertEqual(10, result['misses']['count'])
+            if sys.platform != 'win32':
+                memory = result['memory']
+                self.assertGreater(memory['baseline'], 0)
+                self.assertGreaterEqual(memory['peak'], memory['baseline'])
+
+
+if __name__ == '__main__':
+    unittest.main()
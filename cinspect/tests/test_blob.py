@@ -0,0 +1,116 @@
+from __future__ import absolute_import, print_function
+
+# Standard library
+from os.path import join
+from shutil import rmtree
+import tempfile
+import unittest
+
+# Local library
+from cinspect.index.blob import BlobIndex
+from cinspect.index.serialize import convert_index, write_index
+from cinspect.tests import DATA
+
+# The text of a file with two functions, after a non-ASCII comment.
+TEXT = u'// \xe9\nf() {}\ng() {}\n'
+OFFSET = len(u'// \xe9\n'.encode('utf8'))
+
+
+class TestBlobIndex(unittest.TestCase):
+
+    #### 'TestCase' protocol ##################################################
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.json_path = join(DATA, 'DB')
+        cls.blob_path = join(cls.temp_dir, 'DB.blob')
+        convert_index(cls.json_path, cls.blob_path, 'blob')
+
+    @classmethod
+    def tearDownClass(cls):
+        rmtree(cls.temp_dir)
+
+    #### Tests ################################################################
+
+    def test_should_not_decode_source_for_metadata(self):
+        # Given
+        path = join(self.temp_dir, 'unicode.blob')
+        data = {'methods': {'f': {'source': u'f(); // \xe9', 'path': 'f.c'}}}
+        write_index(path, data, 'blob')
+
+        # When
+        entry = BlobIndex(path).get_method('f')
+
+        # Then
+        self.assertNotIn('source', dict(entry))
+        self.assertEqual('f.c', entry['path'])
+        self.assertEqual(u'f(); // \xe9', entry['source'])
+
+    def test_should_save_sources_from_module_file_once(self):
+        # Given
+        data = self._get_data()
+        path = join(self.temp_dir, 'module.blob')
+        write_index(path, data, 'blob')
+        index = BlobIndex(path)
+
+        # When
+        module = index.get_module('m')
+        function = index.get_method('f')
+
+        # Then
+        module_start, _ = module['span']
+        start, _ = function['span']
+        self.assertEqual(module_start + OFFSET, start)
+        self.assertEqual(data['methods']['f']['source'], function['source'])
+        self.assertEqual(data['modules']['m']['source'], module['source'])
+
+    def test_should_save_sources_without_module_separately(self):
+        # Given
+        data = self._get_data()
+        del data['modules']
+        path = join(self.temp_dir, 'functions.blob')
+
+        # When
+        write_index(path, data, 'blob')
+
+        # Then
+        index = BlobIndex(path)
+        self.assertEqual([0, len(b'f() {}')], index.get_method('f')['span'])
+        self.assertEqual('g() {}', index.get_method('g')['source'])
+
+    def test_should_not_use_extent_of_different_source(self):
+        # Given
+        data = self._get_data()
+        data['methods']['f']['extent'] = [0, 6]
+        path = join(self.temp_dir, 'stale.blob')
+
+        # When
+        write_index(path, data, 'blob')
+
+        # Then
+        self.assertEqual('f() {}', BlobIndex(path).get_method('f')['source'])
+
+    #### Private protocol #####################################################
+
+    def _get_data(self):
+        """ Return an index with a module, and two functions in its file. """
+
+        module = {'source': TEXT, 'path': 'm.c', 'method_maps': []}
+        return {
+            'modules': {'m': module},
+            'methods': {
+                'f': {
+                    'source': 'f() {}', 'path': 'm.c',
+                    'extent': [OFFSET, OFFSET + 6],
+                },
+                'g': {
+                    'source': 'g() {}', 'path': 'm.c',
+                    'extent': [OFFSET + 7, OFFSET + 13],
+                },
+            },
+        }
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+from __future__ import absolute_import, print_function
+
+import sys
+import unittest
+if sys.version_info.major > 2:
+    raise unittest.SkipTest('The clang bindings need Python 2.x')
+
+# Standard library
+import os
+from os.path import join
+from shutil import rmtree
+import tempfile
+
+# Local library
+import cinspect.clang_utils as clang_utils
+import cinspect.vendor.clang.cindex as CI
+
+
+class TestFindClangHeaders(unittest.TestCase):
+    """ Finding the clang headers, with the probing of libclang stubbed. """
+
+    #### 'TestCase' protocol ##################################################
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.include_dir = join(self.temp_dir, 'include')
+        os.mkdir(self.include_dir)
+        self.library_file = join(self.temp_dir, 'libclang.so')
+        with open(self.library_file, 'w') as f:
+            f.write('libclang')
+
+        self.found = False
+        self.guess = ['-I%s' % self.include_dir]
+        self.calls = []
+        self._saved = (
+            clang_utils.HEADERS_CACHE_PATH, clang_utils.can_find_clang_headers,
+            clang_utils.get_libclang_headers, CI.Config.library_file,
+        )
+        clang_utils.HEADERS_CACHE_PATH = join(self.temp_dir, 'headers.json')
+        clang_utils.can_find_clang_headers = self._can_find_clang_headers
+        clang_utils.get_libclang_headers = self._get_libclang_headers
+        CI.Config.library_file = self.library_file
+
+    def tearDown(self):
+        (
+            clang_utils.HEADERS_CACHE_PATH, clang_utils.can_find_clang_headers,
+            clang_utils.get_libclang_headers, CI.Config.library_file,
+        ) = self._saved
+        rmtree(self.temp_dir)
+
+    #### Tests ################################################################
+
+    def test_should_reuse_cached_flags(self):
+        # Given
+        clang_utils.find_clang_headers(['-DX'])
+        del self.calls[:]
+
+        # When
+        flags = clang_utils.find_clang_headers(['-DX'])
+
+        # Then
+        self.assertEqual(self.guess, flags)
+        self.assertEqual([], self.calls)
+
+    def test_should_look_again_for_other_arguments(self):
+        # Given
+        clang_utils.find_clang_headers(['-DX'])
+        del self.calls[:]
+
+        # When
+        clang_utils.find_clang_headers(['-DY'])
+
+        # Then
+        self.assertEqual(['probe', 'guess'], self.calls)
+
+    def test_should_look_again_when_library_changes(self):
+        # Given
+        clang_utils.find_clang_headers([])
+        del self.calls[:]
+        with open(self.library_file, 'a') as f:
+            f.write(' upgraded')
+
+        # When
+        clang_utils.find_clang_headers([])
+
+        # Then
+        self.assertEqual(['probe', 'guess'], self.calls)
+
+    def test_should_look_again_when_include_dir_is_removed(self):
+        # Given
+        clang_utils.find_clang_headers([])
+        del self.calls[:]
+        os.rmdir(self.include_dir)
+
+        # When
+        clang_utils.find_clang_headers([])
+
+        # Then
+        self.assertEqual(['probe', 'guess'], self.calls)
+
+    def test_should_cache_that_no_flags_are_needed(self):
+        # Given
+        self.found = True
+        clang_utils.find_clang_headers([])
+        del self.calls[:]
+
+        # When
+        flags = clang_utils.find_clang_headers([])
+
+        # Then
+        self.assertEqual([], flags)
+        self.assertEqual([], self.calls)
+
+    def test_should_not_cache_failed_guess(self):
+        # Given
+        self.guess = []
+        clang_utils.find_clang_headers([])
+        del self.calls[:]
+
+        # When
+        flags = clang_utils.find_clang_headers([])
+
+        # Then
+        self.assertEqual([], flags)
+        self.assertEqual(['probe', 'guess'], self.calls)
+
+    #### Private protocol #####################################################
+
+    def _can_find_clang_headers(self, clang_args):
+        self.calls.append('probe')
+        return self.found
+
+    def _get_libclang_headers(self):
+        self.calls.append('guess')
+        return list(self.guess)
+
+
+if __name__ == '__main__':
+    unittest.main()
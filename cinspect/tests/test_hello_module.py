@@ -1,7 +1,9 @@
 from __future__ import absolute_import, print_function
 
 # Standard library
-from os.path import abspath, dirname, join
+import copy
+import os
+from os.path import abspath, basename, dirname, join, splitext
 import tempfile
 import re
 from shutil import copytree, rmtree
@@ -10,7 +12,8 @@ import sys
 import unittest
 
 # Local library
-from cinspect import getsource
+from cinspect import getsource, getsource_many
+from cinspect.index.reader import get_reader
 
 
 class TestHelloModule(unittest.TestCase):
@@ -22,6 +25,8 @@ class TestHelloModule(unittest.TestCase):
         cls.hello_dir = join(dirname(abspath(__file__)), 'data')
         cls.temp_dir = tempfile.mktemp()
         cls.index_path = join(cls.temp_dir, 'DB')
+        # The lookups use the shared reader, which doesn't use a server.
+        get_reader(cls.index_path, server=False)
         cls._build_hello_module()
         cls._add_hello_to_path()
 
@@ -56,6 +61,84 @@ class TestHelloModule(unittest.TestCase):
         # Then
         self.assertEqual(source, self._get_code_from_hello_module())
 
+    def test_should_get_sources_for_many_objects(self):
+        # Given
+        import hello
+        objects = [hello, hello.say_hello, unittest.main]
+
+        # When
+        sources = getsource_many(objects, self.index_path)
+
+        # Then
+        self.assertEqual(objects, list(sources))
+        self.assertEqual(
+            [getsource(obj, self.index_path) for obj in objects],
+            list(sources.values())
+        )
+
+    def test_should_report_failures_for_each_object(self):
+        # Given
+        import hello
+        objects = [hello, hello.say_hello, unittest.main]
+
+        # When
+        sources = getsource_many(objects, join(self.temp_dir, 'missing'))
+
+        # Then
+        self.assertIsInstance(sources[hello], OSError)
+        self.assertIsInstance(sources[hello.say_hello], OSError)
+        self.assertEqual(getsource(unittest.main), sources[unittest.main])
+
+    @unittest.skipIf(sys.version_info.major > 2, 'Indexing needs Python 2.x')
+    def test_should_create_same_index_in_parallel(self):
+        # Given
+        from cinspect.index.serialize import read_index
+        index_path = join(self.temp_dir, 'DB-parallel')
+
+        # When
+        self._create_index(index_path, jobs=2)
+
+        # Then
+        self.assertEqual(read_index(self.index_path), read_index(index_path))
+
+    @unittest.skipIf(sys.version_info.major > 2, 'Indexing needs Python 2.x')
+    def test_should_index_hello_module_from_main_file_only(self):
+        # Given
+        from cinspect.index.serialize import read_index
+        index_path = join(self.temp_dir, 'DB-main-file-only')
+
+        # When
+        self._create_index(index_path, main_file_only=True)
+
+        # Then
+        data = read_index(index_path)
+        expected = read_index(self.index_path)
+        self.assertEqual(expected['modules'], data['modules'])
+        self.assertEqual(expected['method_names'], data['method_names'])
+        self.assertEqual(
+            expected['methods']['say_hello'], data['methods']['say_hello']
+        )
+
+    @unittest.skipIf(sys.version_info.major > 2, 'Indexing needs Python 2.x')
+    def test_should_not_parse_failed_files_again(self):
+        # Given
+        from cinspect.index.serialize import read_index
+        index_path = join(self.temp_dir, 'DB-failures')
+        broken_dir = join(self.temp_dir, 'broken')
+        broken_path = join(broken_dir, 'broken.c')
+        os.mkdir(broken_dir)
+        with open(broken_path, 'w') as f:
+            f.write('int broken( {\n')
+        self._create_index(index_path, broken_dir)
+
+        # When
+        # Parsing the file again raises an AssertionError.
+        self._create_index(index_path, broken_dir, parse=False)
+
+        # Then
+        failure = read_index(index_path)['failures'][broken_path]
+        self.assertGreater(len(failure['diagnostics']), 0)
+
     # fixme: add tests for methods, type definitions, ...
 
     #### Private protocol #####################################################
@@ -88,14 +171,20 @@ class TestHelloModule(unittest.TestCase):
         return code
 
     @classmethod
-    def _index_hello_module(cls):
-        import os
+    def _create_index(cls, index_path, path=None, parse=True, **kwargs):
         from cinspect.index.writer import Writer
         from cinspect.clang_utils import get_libclang_headers
-        os.unlink(cls.index_path)
         clang_args = get_libclang_headers() + ['-I%s' % cls.python_headers]
-        writer = Writer(cls.index_path, clang_args=clang_args)
-        writer.create(cls.temp_dir)
+        writer = Writer(index_path, clang_args=clang_args, **kwargs)
+        if not parse:
+            writer._parse_file = _fail_parsing
+        writer.create(cls.temp_dir if path is None else path)
+
+    @classmethod
+    def _index_hello_module(cls):
+        import os
+        os.unlink(cls.index_path)
+        cls._create_index(cls.index_path)
 
     @classmethod
     def _setup_py_2(cls):
@@ -104,5 +193,275 @@ class TestHelloModule(unittest.TestCase):
         cls._index_hello_module()
 
 
+@unittest.skipIf(sys.version_info.major > 2, 'Indexing needs Python 2.x')
+class TestReindexing(unittest.TestCase):
+    """ Re-indexing files, without parsing them (with the parsed entries of
+    each file given by the test).
+
+    """
+
+    #### 'TestCase' protocol ##################################################
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.source_dir = join(self.temp_dir, 'src')
+        self.index_path = join(self.temp_dir, 'DB')
+        os.mkdir(self.source_dir)
+
+    def tearDown(self):
+        rmtree(self.temp_dir)
+
+    #### Tests ################################################################
+
+    def test_should_replace_entries_of_changed_file(self):
+        # Given
+        path = self._write_file('a.c', 'int f(void);')
+        self._index({path: _get_entries(path, ['f', 'g'])})
+        self._write_file('a.c', 'int f(void); // g was renamed to h')
+
+        # When
+        data = self._index({path: _get_entries(path, ['f', 'h'])})
+
+        # Then
+        self.assertEqual({'f', 'h'}, set(data['methods']))
+        self.assertEqual(['f', 'h'], data['files'][path]['methods'])
+
+    def test_should_remove_entries_of_removed_file(self):
+        # Given
+        a = self._write_file('a.c', 'int f(void);')
+        b = self._write_file('b.c', 'int g(void);')
+        self._index({a: _get_entries(a, ['f']), b: _get_entries(b, ['g'])})
+        os.unlink(b)
+
+        # When
+        data = self._index({})
+
+        # Then
+        self.assertEqual({'f'}, set(data['methods']))
+        self.assertEqual({'a_methods'}, set(data['method_names']))
+        self.assertEqual([a], list(data['hashes']))
+        self.assertEqual([a], list(data['files']))
+
+    def test_should_keep_entries_replaced_by_other_file(self):
+        # Given
+        a = self._write_file('a.c', 'int f(void);')
+        b = self._write_file('b.c', 'int f(void);')
+        self._index({a: _get_entries(a, ['f']), b: _get_entries(b, ['f'])})
+        self._write_file('a.c', 'int g(void);')
+
+        # When
+        data = self._index({a: _get_entries(a, ['g'])})
+
+        # Then
+        self.assertEqual(b, data['methods']['f']['path'])
+        self.assertEqual(a, data['methods']['g']['path'])
+
+    def test_should_keep_method_maps_shared_with_other_file(self):
+        # Given
+        a = self._write_file('a.c', 'int f(void);')
+        b = self._write_file('b.c', 'int f(void);')
+        entries = {
+            a: _get_entries(a, ['f'], 'shared_methods'),
+            b: _get_entries(b, ['f'], 'shared_methods'),
+        }
+        self._index(entries)
+        os.unlink(a)
+
+        # When
+        data = self._index({})
+
+        # Then
+        self.assertIn('shared_methods', data['method_names'])
+        self.assertEqual(b, data['methods']['f']['path'])
+
+    def test_should_not_hash_files_with_same_stat(self):
+        # Given
+        path = self._write_file('a.c', 'int f(void);')
+        self._index({path: _get_entries(path, ['f'])})
+
+        # When
+        hashed = []
+        self._index({}, hashed=hashed)
+
+        # Then
+        self.assertEqual([], hashed)
+
+    def test_should_only_update_stat_of_touched_files(self):
+        # Given
+        path = self._write_file('a.c', 'int f(void);')
+        data = self._index({path: _get_entries(path, ['f'])})
+        st = os.stat(path)
+        os.utime(path, (st.st_atime, st.st_mtime + 10))
+
+        # When
+        hashed = []
+        new_data = self._index({}, hashed=hashed)
+
+        # Then
+        self.assertEqual([path], hashed)
+        self.assertEqual(data['hashes'], new_data['hashes'])
+        self.assertNotEqual(data['file_stats'][path], new_data['file_stats'][path])
+        self.assertEqual(data['methods'], new_data['methods'])
+
+    def test_should_hash_all_files_when_verifying(self):
+        # Given
+        a = self._write_file('a.c', 'int f(void);')
+        b = self._write_file('b.c', 'int g(void);')
+        self._index({a: _get_entries(a, ['f']), b: _get_entries(b, ['g'])})
+
+        # When
+        hashed = []
+        self._index({}, hashed=hashed, verify=True)
+
+        # Then
+        self.assertEqual([a, b], hashed)
+
+    def test_should_parse_failed_files_again_without_pch(self):
+        # Given
+        path = self._write_file('a.c', 'int f(void);')
+        self._index({}, failed=[path], pch=join(self.temp_dir, 'Python.pch'))
+
+        # When
+        data = self._index({path: _get_entries(path, ['f'])}, pch=False)
+
+        # Then
+        self.assertIn('f', data['methods'])
+        self.assertNotIn(path, data['failures'])
+
+    #### Private protocol #####################################################
+
+    def _index(self, entries, hashed=None, failed=(), pch=False, **kwargs):
+        """ Index the source directory, and return the index data.
+
+        Files that are not in the entries, or failed, must not be parsed.
+        The paths of the files hashed are appended to hashed, if given.
+
+        """
+
+        from cinspect.index.serialize import read_index
+        from cinspect.index.writer import ParseError, Writer
+
+        def parse_file(path):
+            if path in failed:
+                raise ParseError(['%s:1: error' % path])
+            if path not in entries:
+                _fail_parsing(path)
+            return copy.deepcopy(entries[path])
+
+        writer = Writer(self.index_path, pch=pch, **kwargs)
+        writer._parse_file = parse_file
+        if hashed is not None:
+            get_file_hash = writer._get_file_hash
+
+            def hash_file(path):
+                hashed.append(path)
+                return get_file_hash(path)
+
+            writer._get_file_hash = hash_file
+        writer.create(self.source_dir)
+        return read_index(self.index_path)
+
+    def _write_file(self, name, text):
+        path = join(self.source_dir, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+
+@unittest.skipIf(sys.version_info.major > 2, 'Indexing needs Python 2.x')
+class TestPrecompiledHeader(unittest.TestCase):
+    """ Parsing files with a precompiled header (with the parsing results
+    given by the test).
+
+    """
+
+    #### Tests ################################################################
+
+    def test_should_parse_file_again_without_pch_on_errors(self):
+        # Given
+        writer, parsed = self._get_writer(pch_errors=['unknown type name'])
+
+        # When
+        tu = writer._get_cursor_for_file('a.c')
+
+        # Then
+        self.assertEqual('a.c', tu)
+        self.assertEqual([('a.c', 'Python.pch'), ('a.c', None)], parsed)
+        self.assertEqual('Python.pch', writer.pch)
+
+    def test_should_not_use_pch_again_if_it_cant_be_used(self):
+        # Given
+        writer, parsed = self._get_writer(
+            pch_errors=['precompiled header was built differently']
+        )
+
+        # When
+        writer._get_cursor_for_file('a.c')
+        writer._get_cursor_for_file('b.c')
+
+        # Then
+        self.assertEqual(
+            [('a.c', 'Python.pch'), ('a.c', None), ('b.c', None)], parsed
+        )
+
+    def test_should_raise_errors_without_pch(self):
+        # Given
+        from cinspect.index.writer import ParseError
+        writer, parsed = self._get_writer(
+            pch_errors=['unknown type name'], errors=['expected expression']
+        )
+
+        # When/Then
+        with self.assertRaises(ParseError):
+            writer._get_cursor_for_file('a.c')
+        self.assertEqual([('a.c', 'Python.pch'), ('a.c', None)], parsed)
+
+    #### Private protocol #####################################################
+
+    def _get_writer(self, pch_errors=(), errors=()):
+        """ Return a writer using a precompiled header, whose translation
+        units are the paths parsed, and the list of (path, pch) parsed.
+
+        """
+
+        from cinspect.index.writer import Writer
+
+        parsed = []
+
+        def parse(path, pch):
+            parsed.append((path, pch))
+            messages = pch_errors if pch is not None else errors
+            return path, [_Diagnostic(message) for message in messages]
+
+        writer = Writer('DB', pch='Python.pch')
+        writer._parse_translation_unit = parse
+        writer._format_diagnostic = lambda diagnostic: diagnostic.spelling
+        return writer, parsed
+
+
+class _Diagnostic(object):
+    def __init__(self, spelling):
+        self.spelling = spelling
+
+
+def _get_entries(path, functions, map_name=None):
+    """ Return the parsed entries of a file, defining the functions. """
+
+    if map_name is None:
+        map_name = '%s_methods' % splitext(basename(path))[0]
+
+    return {
+        'methods': dict(
+            (name, {'source': 'int %s(void);' % name, 'path': path})
+            for name in functions
+        ),
+        'method_names': {map_name: dict((name, name) for name in functions)},
+    }
+
+
+def _fail_parsing(path):
+    raise AssertionError('%s was parsed' % path)
+
+
 if __name__ == '__main__':
     unittest.main()
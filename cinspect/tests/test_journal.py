@@ -0,0 +1,143 @@
+from __future__ import absolute_import, print_function
+
+# Standard library
+import json
+import os
+from os.path import exists, join
+from shutil import rmtree
+import tempfile
+import unittest
+
+# Local library
+from cinspect._types import BuiltinFunction
+from cinspect.index.journal import (
+    get_changes, get_journal_path, get_journal_size, snapshot
+)
+from cinspect.index.lookup import build_lookup_tables
+from cinspect.index.reader import Reader
+from cinspect.index.serialize import read_index, write_index
+from cinspect.tests import DATA, Function
+
+
+class TestJournal(unittest.TestCase):
+
+    #### 'TestCase' protocol ##################################################
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.index_path = join(self.temp_dir, 'index.json')
+        write_index(self.index_path, read_index(join(DATA, 'DB')), 'json')
+
+    def tearDown(self):
+        rmtree(self.temp_dir)
+
+    #### Tests ################################################################
+
+    def test_should_append_changes_to_journal(self):
+        # Given
+        with open(self.index_path) as f:
+            text = f.read()
+
+        # When
+        data = self._update(self._add_say_bye)
+
+        # Then
+        with open(self.index_path) as f:
+            self.assertEqual(text, f.read())
+        self.assertTrue(exists(get_journal_path(self.index_path)))
+        self.assertEqual(build_lookup_tables(data), read_index(self.index_path))
+
+    def test_should_remove_entries(self):
+        # When
+        self._update(lambda data: data['methods'].pop('say_hello'))
+
+        # Then
+        self.assertNotIn('say_hello', read_index(self.index_path)['methods'])
+
+    def test_should_find_objects_added_to_journal(self):
+        # Given
+        reader = Reader(self.index_path, server=False)
+        obj = BuiltinFunction(Function('hello', 'say_bye'))
+        self.assertEqual('', reader.get_source(obj))
+
+        # When
+        self._update(self._add_say_bye)
+
+        # Then
+        self.assertEqual('// bye', reader.get_source(obj))
+
+    def test_should_ignore_incomplete_updates(self):
+        # Given
+        self._update(self._add_say_bye)
+        with open(get_journal_path(self.index_path), 'a') as f:
+            f.write('{"methods": {"say_hello": null')
+
+        # When
+        data = read_index(self.index_path)
+
+        # Then
+        self.assertIn('say_hello', data['methods'])
+        self.assertIn('say_bye', data['methods'])
+
+    def test_should_commit_updates_after_incomplete_update(self):
+        # Given
+        self._update(self._add_say_bye)
+        with open(get_journal_path(self.index_path), 'a') as f:
+            f.write('{"methods": {"say_hello": null')
+
+        # When
+        self._update(lambda data: data['methods'].pop('say_bye'))
+
+        # Then
+        data = read_index(self.index_path)
+        self.assertIn('say_hello', data['methods'])
+        self.assertNotIn('say_bye', data['methods'])
+
+    def test_should_compact_large_journal(self):
+        # Given
+        source = 'x' * os.path.getsize(self.index_path)
+
+        # When
+        self._update(self._add_say_bye, source)
+        self._update(self._set_hello_source)
+
+        # Then
+        self.assertEqual(0, get_journal_size(self.index_path))
+        with open(self.index_path) as f:
+            data = json.load(f)
+        self.assertEqual(source, data['methods']['say_bye']['source'])
+        self.assertEqual('// hello', data['modules']['hello']['source'])
+
+    def test_should_ignore_journal_of_replaced_index(self):
+        # Given
+        self._update(self._add_say_bye)
+
+        # When
+        write_index(self.index_path, read_index(join(DATA, 'DB')), 'json')
+        os.rename(self.index_path, self.index_path + '.old')
+        write_index(self.index_path, read_index(join(DATA, 'DB')), 'json')
+
+        # Then
+        self.assertNotIn('say_bye', read_index(self.index_path)['methods'])
+
+    #### Private protocol #####################################################
+
+    def _add_say_bye(self, data, source='// bye'):
+        data['methods']['say_bye'] = {'source': source, 'path': 'hello.c'}
+        data['method_names']['HelloMethods'] = dict(
+            data['method_names']['HelloMethods'], say_bye='say_bye'
+        )
+
+    def _set_hello_source(self, data):
+        data['modules']['hello'] = dict(data['modules']['hello'], source='// hello')
+
+    def _update(self, update, *args):
+        data = read_index(self.index_path)
+        original = snapshot(data)
+        update(data, *args)
+        write_index(self.index_path, data, 'json', get_changes(original, data))
+        return data
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+from __future__ import absolute_import, print_function
+
+# Standard library
+from os.path import join
+from shutil import rmtree
+import tempfile
+import unittest
+
+# Local library
+from cinspect.index.bloom import BloomFilter
+from cinspect.index.lookup import build_lookup_tables, rank_candidates
+from cinspect.index.serialize import FORMATS, open_index, write_index
+
+
+class TestLookupTables(unittest.TestCase):
+
+    def test_should_prefer_earlier_method_maps(self):
+        # Given
+        data = {
+            'method_names': {
+                'first': {'append': 'first_append'},
+                'second': {'append': 'second_append', 'pop': 'second_pop'},
+            },
+            'modules': {'m': {'method_maps': ['first', 'second', None]}},
+            'objects': {'T': {'references': ['missing', 'second', 'first']}},
+        }
+
+        # When
+        build_lookup_tables(data)
+
+        # Then
+        self.assertEqual(
+            {'m': {'append': 'first_append', 'pop': 'second_pop'}},
+            data['module_methods']
+        )
+        self.assertEqual(
+            {'T': {'append': 'second_append', 'pop': 'second_pop'}},
+            data['type_methods']
+        )
+
+    def test_should_rank_candidates_by_owner(self):
+        # Given
+        data = build_lookup_tables(_get_data())
+
+        # When
+        candidates = rank_candidates(data['names']['append'], 'list')
+
+        # Then
+        self.assertEqual(
+            ['list_append', 'array_append', 'deque_append'],
+            [candidate['function'] for candidate in candidates]
+        )
+
+
+class TestNameFallback(unittest.TestCase):
+
+    #### 'TestCase' protocol ##################################################
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.temp_dir)
+
+    #### Tests ################################################################
+
+    def test_should_find_methods_of_types_not_indexed(self):
+        for format in FORMATS:
+            # Given
+            index = self._open_index(format)
+
+            # When/Then
+            self.assertEqual('list_append', index.get_type_method('list', 'append'))
+            self.assertEqual('deque_append', index.get_type_method('deque', 'append'))
+            self.assertIsNone(index.get_type_method('deque', 'extend'))
+
+    def test_should_find_functions_of_modules_not_indexed(self):
+        for format in FORMATS:
+            # Given
+            index = self._open_index(format)
+
+            # When/Then
+            self.assertEqual(
+                'array_append', index.get_module_method('array', 'append')
+            )
+            self.assertIsNone(index.get_module_method('os', 'append'))
+            self.assertIsNone(index.get_module_method('os', 'extend'))
+
+    def test_should_find_only_function_not_owned_by_others(self):
+        for format in FORMATS:
+            # Given
+            index = self._open_index(format)
+
+            # When/Then
+            self.assertEqual('lonely_pop', index.get_module_method('os', 'popitem'))
+
+    def test_should_not_match_short_owner_inside_other_names(self):
+        for format in FORMATS:
+            # Given
+            index = self._open_index(format)
+
+            # When/Then
+            self.assertEqual(
+                'functools_reduce', index.get_module_method('functools', 'reduce')
+            )
+            self.assertIsNone(index.get_module_method('io', 'reduce'))
+
+    #### Private protocol #####################################################
+
+    def _open_index(self, format):
+        path = join(self.temp_dir, 'index.%s' % format)
+        write_index(path, _get_data(), format)
+        return open_index(path)
+
+
+class TestNameFilter(unittest.TestCase):
+
+    #### 'TestCase' protocol ##################################################
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.temp_dir)
+
+    #### Tests ################################################################
+
+    def test_should_not_have_false_negatives(self):
+        # Given
+        keys = ['name-%d' % i for i in range(1000)]
+
+        # When
+        bloom_filter = BloomFilter.from_dict(BloomFilter.for_keys(keys).to_dict())
+
+        # Then
+        self.assertTrue(all(key in bloom_filter for key in keys))
+        false_positives = sum('other-%d' % i in bloom_filter for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+    def test_should_reject_names_not_in_index(self):
+        for format in FORMATS:
+            # Given
+            path = join(self.temp_dir, 'index.%s' % format)
+            write_index(path, _get_data(), format)
+
+            # When
+            index = open_index(path)
+
+            # Then
+            self.assertTrue(index.may_contain('objects', 'deque'))
+            self.assertTrue(index.may_contain('names', 'append'))
+            self.assertFalse(index.may_contain('objects', 'append'))
+            self.assertFalse(index.may_contain('names', 'extend'))
+
+
+def _get_data():
+    return {
+        'method_names': {
+            'array_methods': {'append': 'array_append'},
+            'deque_methods': {'append': 'deque_append', 'pop': 'deque_pop'},
+            'functools_functions': {'reduce': 'functools_reduce'},
+            'list_methods': {'append': 'list_append'},
+            'lonely_methods': {'popitem': 'lonely_pop'},
+        },
+        'modules': {
+            'functools': {
+                'source': '', 'path': '', 'method_maps': ['functools_functions'],
+            },
+        },
+        'objects': {
+            'deque': {'source': '', 'path': '', 'references': ['deque_methods']},
+        },
+    }
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -18,6 +18,7 @@ from nose.plugins.attrib import attr
 # Local library
 from cinspect import getfile, getsource
 from cinspect._types import BuiltinMethod, MethodDescriptor
+from cinspect.index.reader import get_reader
 
 # Imports for testing
 import gc
@@ -36,6 +37,8 @@ class TestPythonInspection(unittest.TestCase):
         cls.temp_dir = tempfile.mkdtemp()
         cls.python_dir = join(cls.temp_dir, 'Python-2.7.8')
         cls.index_path = join(cls.temp_dir, 'DB')
+        # The lookups use the shared reader, which doesn't use a server.
+        get_reader(cls.index_path, server=False)
         cls._get_and_extract_python_sources()
         cls._configure_python()
         cls._index_sources()
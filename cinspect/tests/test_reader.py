@@ -0,0 +1,117 @@
+from __future__ import absolute_import, print_function
+
+# Standard library
+import json
+import os
+from os.path import join
+from shutil import copy, rmtree
+import tempfile
+import unittest
+
+# Local library
+from cinspect._types import BuiltinFunction, Module
+from cinspect.index.reader import clear_cache, get_reader
+from cinspect.tests import DATA, Function
+
+
+class TestReader(unittest.TestCase):
+
+    #### 'TestCase' protocol ##################################################
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.index_path = join(self.temp_dir, 'DB')
+        copy(join(DATA, 'DB'), self.index_path)
+        clear_cache()
+
+    def tearDown(self):
+        clear_cache()
+        rmtree(self.temp_dir)
+
+    #### Tests ################################################################
+
+    def test_should_share_reader_for_same_index(self):
+        # When
+        reader = get_reader(self.index_path, server=False)
+
+        # Then
+        self.assertIs(reader, get_reader(join(self.temp_dir, '.', 'DB')))
+
+    def test_should_load_index_only_once(self):
+        # Given
+        reader = get_reader(self.index_path, server=False)
+        obj = BuiltinFunction(Function('hello', 'say_hello'))
+
+        # When
+        source = reader.get_source(obj)
+        index = reader._index
+        reader.get_file(obj)
+
+        # Then
+        self.assertIn('say_hello', source)
+        self.assertIs(index, reader._index)
+
+    def test_should_reload_modified_index(self):
+        # Given
+        reader = get_reader(self.index_path, server=False)
+        obj = Module(Function(None, 'hello'))
+        reader.get_source(obj)
+        self._update_index(lambda data: data['modules']['hello'].update(source='// hello'))
+
+        # When
+        source = reader.get_source(obj)
+
+        # Then
+        self.assertEqual('// hello', source)
+
+    def test_should_create_new_reader_after_clearing_cache(self):
+        # Given
+        reader = get_reader(self.index_path, server=False)
+
+        # When
+        clear_cache()
+
+        # Then
+        self.assertIsNot(reader, get_reader(self.index_path, server=False))
+
+    def test_should_report_missing_objects(self):
+        # Given
+        reader = get_reader(self.index_path, server=False)
+        missing = BuiltinFunction(Function('hello', 'say_bye'))
+
+        # When/Then
+        self.assertEqual('', reader.get_source(missing))
+        self.assertFalse(reader.is_indexed(missing))
+        self.assertTrue(reader.is_indexed(BuiltinFunction(Function('hello', 'say_hello'))))
+
+    def test_should_look_up_misses_again_after_index_changes(self):
+        # Given
+        reader = get_reader(self.index_path, server=False)
+        obj = Module(Function(None, 'goodbye'))
+        reader.get_source(obj)
+        self._update_index(lambda data: data['modules'].update(
+            goodbye={'source': '// goodbye', 'path': 'goodbye.c', 'method_maps': []}
+        ))
+
+        # When
+        source = reader.get_source(obj)
+
+        # Then
+        self.assertEqual('// goodbye', source)
+        self.assertTrue(reader.is_indexed(obj))
+
+    #### Private protocol #####################################################
+
+    def _update_index(self, update):
+        with open(self.index_path) as f:
+            data = json.load(f)
+        update(data)
+        with open(self.index_path, 'w') as f:
+            json.dump(data, f)
+        # Make sure the change is visible, even on coarse mtime filesystems.
+        stat = os.stat(self.index_path)
+        os.utime(self.index_path, (stat.st_atime, stat.st_mtime + 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+from __future__ import absolute_import, print_function
+
+# Standard library
+from os.path import join
+from shutil import rmtree
+import tempfile
+import unittest
+
+# Local library
+from cinspect._types import BuiltinFunction, Module
+from cinspect.index.lookup import build_lookup_tables
+from cinspect.index.reader import Reader
+from cinspect.index.serialize import (
+    EXTENSIONS, FORMATS, convert_index, get_index_format, read_index,
+    write_index
+)
+from cinspect.tests import DATA, Function
+
+
+class TestFormats(unittest.TestCase):
+    """ Tests common to all the storage formats. """
+
+    #### 'TestCase' protocol ##################################################
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.json_path = join(DATA, 'DB')
+        cls.paths = {}
+        for format in FORMATS:
+            path = join(cls.temp_dir, 'DB%s' % EXTENSIONS[format])
+            convert_index(cls.json_path, path, format)
+            cls.paths[format] = path
+
+    @classmethod
+    def tearDownClass(cls):
+        rmtree(cls.temp_dir)
+
+    #### Tests ################################################################
+
+    def test_should_read_back_converted_index(self):
+        expected = build_lookup_tables(read_index(self.json_path))
+        for format, path in self.paths.items():
+            self.assertEqual(format, get_index_format(path))
+            self.assertEqual(expected, read_index(path), format)
+
+    def test_should_read_back_file_metadata(self):
+        # Given
+        data = read_index(self.json_path)
+        data['file_stats'] = dict(
+            (path, [1024, 1500000000123456789, 42]) for path in data['hashes']
+        )
+        data['files'] = dict(
+            (path, {'methods': ['say_hello'], 'modules': ['hello']})
+            for path in data['hashes']
+        )
+        data['failures'] = {
+            '/src/broken.c': {
+                'hash': 'd41d8cd98f00b204e9800998ecf8427e',
+                'args': '0cc175b9c0f1b6a831c399e269772661',
+                'diagnostics': ['/src/broken.c:1: expected identifier'],
+            }
+        }
+
+        for format in FORMATS:
+            path = join(self.temp_dir, 'files%s' % EXTENSIONS[format])
+
+            # When
+            write_index(path, data, format)
+
+            # Then
+            new_data = read_index(path)
+            for section in ('file_stats', 'files', 'failures'):
+                self.assertEqual(data[section], new_data[section], format)
+
+    def test_should_get_same_source_as_json_index(self):
+        # Given
+        objects = [
+            BuiltinFunction(Function('hello', 'say_hello')),
+            Module(Function(None, 'hello')),
+        ]
+        json_reader = Reader(self.json_path, server=False)
+
+        for format, path in self.paths.items():
+            reader = Reader(path, server=False)
+            for obj in objects:
+                # When
+                source = reader.get_source(obj)
+
+                # Then
+                self.assertGreater(len(source), 0)
+                self.assertEqual(json_reader.get_source(obj), source, format)
+                self.assertEqual(
+                    json_reader.get_file(obj), reader.get_file(obj), format
+                )
+
+    def test_should_get_empty_source_for_missing_function(self):
+        # Given
+        obj = BuiltinFunction(Function('hello', 'say_bye'))
+
+        for format, path in self.paths.items():
+            # When
+            source = Reader(path, server=False).get_source(obj)
+
+            # Then
+            self.assertEqual('', source, format)
+
+
+if __name__ == '__main__':
+    unittest.main()
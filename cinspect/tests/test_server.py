@@ -0,0 +1,91 @@
+from __future__ import absolute_import, print_function
+
+# Standard library
+from os.path import join, realpath
+from shutil import rmtree
+import socket
+import tempfile
+import threading
+import unittest
+if not hasattr(socket, 'AF_UNIX'):
+    raise unittest.SkipTest('The lookup server needs Unix domain sockets')
+
+# Local library
+from cinspect._types import BuiltinFunction, Module
+from cinspect.index.reader import Reader
+from cinspect.index.server import LookupServer, is_server_running
+from cinspect.tests import DATA, Function
+
+
+class TestLookupServer(unittest.TestCase):
+
+    #### 'TestCase' protocol ##################################################
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.socket_path = join(self.temp_dir, 'server.sock')
+        self.index_path = realpath(join(DATA, 'DB'))
+        self.server = LookupServer(self.socket_path)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self._stop_server()
+        rmtree(self.temp_dir)
+
+    #### Tests ################################################################
+
+    def test_should_get_same_results_as_local_reader(self):
+        # Given
+        reader = Reader(self.index_path, server=self.socket_path)
+        local_reader = Reader(self.index_path, server=False)
+        objects = [
+            BuiltinFunction(Function('hello', 'say_hello')),
+            Module(Function(None, 'hello')),
+        ]
+
+        for obj in objects:
+            # When
+            source = reader.get_source(obj)
+
+            # Then
+            self.assertEqual(local_reader.get_source(obj), source)
+            self.assertEqual(local_reader.get_file(obj), reader.get_file(obj))
+
+        self.assertIn(self.index_path, self.server._readers)
+        self.assertEqual(
+            local_reader.get_sources(objects), reader.get_sources(objects)
+        )
+
+    def test_should_raise_lookup_errors_from_server(self):
+        # Given
+        reader = Reader(join(self.temp_dir, 'missing'), server=self.socket_path)
+
+        # When/Then
+        with self.assertRaises(OSError):
+            reader.get_source(Module(Function(None, 'hello')))
+
+    def test_should_fall_back_to_local_lookups_without_server(self):
+        # Given
+        reader = Reader(self.index_path, server=self.socket_path)
+        obj = Module(Function(None, 'hello'))
+        reader.get_source(obj)
+
+        # When
+        self._stop_server()
+
+        # Then
+        self.assertFalse(is_server_running(self.socket_path))
+        self.assertIn('say_hello', reader.get_source(obj))
+
+    #### Private protocol #####################################################
+
+    def _stop_server(self):
+        if self.thread.is_alive():
+            self.server.shutdown()
+            self.server.server_close()
+            self.thread.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+from __future__ import absolute_import, print_function
+
+# Standard library
+import os
+from os.path import join
+from shutil import rmtree
+import tempfile
+import unittest
+
+# Local library
+from cinspect.index.serialize import write_index
+from cinspect.index.sharded import SHARDS_DIR, ShardedIndex
+
+
+class TestShardedIndex(unittest.TestCase):
+
+    #### 'TestCase' protocol ##################################################
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.sharded_path = join(self.temp_dir, 'DB.shards')
+
+    def tearDown(self):
+        rmtree(self.temp_dir)
+
+    #### Tests ################################################################
+
+    def test_should_keep_loaded_shards_within_budget(self):
+        # Given
+        write_index(self.sharded_path, self._get_data(), 'sharded')
+        index = ShardedIndex(self.sharded_path, memory_budget=1)
+
+        # When
+        sources = [index.get_method('f%s' % i)['source'] for i in range(3)]
+
+        # Then
+        self.assertEqual(['f0();', 'f1();', 'f2();'], sources)
+        self.assertEqual(1, len(index._shards))
+
+    def test_should_remove_stale_shards(self):
+        # Given
+        data = self._get_data()
+        write_index(self.sharded_path, data, 'sharded')
+
+        # When
+        del data['methods']['f0']
+        write_index(self.sharded_path, data, 'sharded')
+
+        # Then
+        self.assertEqual(2, len(os.listdir(join(self.sharded_path, SHARDS_DIR))))
+        self.assertIsNone(ShardedIndex(self.sharded_path).get_method('f0'))
+
+    #### Private protocol #####################################################
+
+    def _get_data(self):
+        return {
+            'methods': dict(
+                ('f%s' % i, {'source': 'f%s();' % i, 'path': 'f%s.c' % i})
+                for i in range(3)
+            ),
+        }
+
+
+if __name__ == '__main__':
+    unittest.main()
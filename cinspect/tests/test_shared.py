@@ -0,0 +1,91 @@
+from __future__ import absolute_import, print_function
+
+import sys
+import unittest
+if sys.version_info[:2] < (3, 8):
+    raise unittest.SkipTest('Shared memory is only supported in Py3.8+')
+
+# Standard library
+from multiprocessing import Pool
+from os.path import join
+
+# Local library
+from cinspect._types import BuiltinFunction, Module
+from cinspect.index.reader import Reader
+from cinspect.index.shared import PackedIndex, create_shared_index, pack_index
+from cinspect.index.serialize import read_index
+from cinspect.tests import DATA, Function
+
+INDEX_PATH = join(DATA, 'DB')
+
+
+def get_source_from_shared_index(args):
+    name, module, function = args
+    obj = BuiltinFunction(Function(module, function))
+    return Reader(shared_memory=name).get_source(obj)
+
+
+class TestSharedIndex(unittest.TestCase):
+
+    def test_should_get_same_source_as_json_index(self):
+        # Given
+        index = PackedIndex(pack_index(read_index(INDEX_PATH)))
+        reader = Reader(INDEX_PATH, server=False)
+        objects = [
+            BuiltinFunction(Function('hello', 'say_hello')),
+            BuiltinFunction(Function('hello', 'say_bye')),
+            Module(Function(None, 'hello')),
+        ]
+
+        for obj in objects:
+            # When
+            data = reader._get_data(obj, index)
+
+            # Then
+            self.assertEqual(reader.get_source(obj), data['source'])
+            self.assertEqual(reader.get_file(obj), data['path'])
+
+    def test_should_find_methods_by_owner(self):
+        # Given
+        data = {
+            'method_names': {'list_methods': {'append': 'list_append'}},
+            'objects': {
+                'list': {'source': '', 'path': '', 'references': ['list_methods']},
+            },
+        }
+        index = PackedIndex(pack_index(data))
+
+        # When/Then
+        self.assertEqual('list_append', index.get_type_method('list', 'append'))
+        self.assertIsNone(index.get_type_method('list', 'pop'))
+        self.assertIsNone(index.get_type_method('deque', 'append'))
+        self.assertIsNone(index.get_module_method('hello', 'pop'))
+
+    def test_should_look_up_in_shared_memory_from_workers(self):
+        # Given
+        shared_memory = create_shared_index(INDEX_PATH)
+        expected = Reader(INDEX_PATH, server=False).get_source(
+            BuiltinFunction(Function('hello', 'say_hello'))
+        )
+
+        # When
+        try:
+            pool = Pool(2)
+            try:
+                sources = pool.map(
+                    get_source_from_shared_index,
+                    [(shared_memory.name, 'hello', 'say_hello')] * 4
+                )
+            finally:
+                pool.close()
+                pool.join()
+        finally:
+            shared_memory.close()
+            shared_memory.unlink()
+
+        # Then
+        self.assertEqual([expected] * 4, sources)
+
+
+if __name__ == '__main__':
+    unittest.main()
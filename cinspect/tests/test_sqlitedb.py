@@ -0,0 +1,37 @@
+from __future__ import absolute_import, print_function
+
+# Standard library
+from os.path import join
+from shutil import rmtree
+import tempfile
+import unittest
+
+# Local library
+from cinspect.index.serialize import convert_index, get_index_format
+from cinspect.tests import DATA
+
+
+class TestSqliteIndex(unittest.TestCase):
+
+    #### 'TestCase' protocol ##################################################
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        cls.json_path = join(DATA, 'DB')
+        cls.sqlite_path = join(cls.temp_dir, 'DB.sqlite')
+        convert_index(cls.json_path, cls.sqlite_path, 'sqlite')
+
+    @classmethod
+    def tearDownClass(cls):
+        rmtree(cls.temp_dir)
+
+    #### Tests ################################################################
+
+    def test_should_detect_sqlite_index(self):
+        self.assertEqual('sqlite', get_index_format(self.sqlite_path))
+        self.assertEqual('json', get_index_format(self.json_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
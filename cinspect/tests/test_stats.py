@@ -0,0 +1,69 @@
+from __future__ import absolute_import, print_function
+
+# Standard library
+from os.path import join
+import unittest
+
+# Local library
+import cinspect
+from cinspect._types import BuiltinFunction, Module
+from cinspect.index.reader import Reader
+from cinspect.index.stats import add_hook, remove_hook, reset_stats
+from cinspect.tests import DATA, Function
+
+
+class TestStats(unittest.TestCase):
+
+    #### 'TestCase' protocol ##################################################
+
+    def setUp(self):
+        reset_stats()
+        self.events = []
+        add_hook(self._record_event)
+
+    def tearDown(self):
+        remove_hook(self._record_event)
+        reset_stats()
+
+    #### Tests ################################################################
+
+    def test_should_count_hits_and_misses_by_kind(self):
+        # Given
+        reader = Reader(join(DATA, 'DB'), server=False)
+
+        # When
+        reader.get_source(BuiltinFunction(Function('hello', 'say_hello')))
+        reader.get_source(BuiltinFunction(Function('hello', 'say_bye')))
+        reader.get_file(Module(Function(None, 'hello')))
+
+        # Then
+        stats = cinspect.stats()
+        self.assertEqual(1, stats['index_load']['count'])
+        self.assertGreater(stats['bytes_loaded'], 0)
+        lookups = stats['lookups']
+        self.assertEqual(2, lookups['BuiltinFunction']['count'])
+        self.assertEqual(1, lookups['BuiltinFunction']['hits'])
+        self.assertEqual(1, lookups['BuiltinFunction']['misses'])
+        self.assertEqual(1, lookups['Module']['hits'])
+
+    def test_should_call_hooks_with_events(self):
+        # Given
+        reader = Reader(join(DATA, 'DB'), server=False)
+
+        # When
+        reader.get_source(Module(Function(None, 'hello')))
+
+        # Then
+        events = [event for (event, _) in self.events]
+        self.assertEqual(['bytes_loaded', 'index_load', 'lookup'], events)
+        self.assertEqual('Module', self.events[-1][1]['kind'])
+        self.assertTrue(self.events[-1][1]['hit'])
+
+    #### Private protocol #####################################################
+
+    def _record_event(self, event, info):
+        self.events.append((event, info))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+from __future__ import absolute_import, print_function
+
+# Standard library
+import collections
+import gc
+import inspect
+import unittest
+import weakref
+
+# Local library
+from cinspect._types import (
+    BuiltinFunction, MethodDescriptor, PythonObject, Type,
+    get_cinspect_object
+)
+
+
+class TestGetCInspectObject(unittest.TestCase):
+
+    def test_should_classify_objects(self):
+        # Given
+        objects = [
+            (len, BuiltinFunction),
+            (dict.keys, MethodDescriptor),
+            (dict, Type),
+            ({}, Type),
+            (inspect.getsource, PythonObject),
+            (collections.namedtuple, PythonObject),
+            (dict.__repr__, MethodDescriptor),
+            (unittest, PythonObject),
+            (unittest.TestCase, PythonObject),
+        ]
+
+        for obj, kind in objects:
+            # When
+            wrapped = get_cinspect_object(obj)
+
+            # Then
+            self.assertIs(kind, type(wrapped))
+
+    def test_should_wrap_builtins_only_once(self):
+        for obj in (len, dict.keys, dict, inspect.getsource):
+            self.assertIs(get_cinspect_object(obj), get_cinspect_object(obj))
+
+    def test_should_not_keep_instances_of_bound_methods_alive(self):
+        # Given
+        instance = _Dict(a=1)
+        reference = weakref.ref(instance)
+
+        # When
+        for method in (instance.keys, instance.update, instance.method):
+            get_cinspect_object(method)
+        del instance, method
+        gc.collect()
+
+        # Then
+        self.assertIsNone(reference())
+
+    def test_should_wrap_instances_as_their_type(self):
+        # When
+        wrapped = get_cinspect_object([])
+
+        # Then
+        self.assertIs(Type, type(wrapped))
+        self.assertIs(list, wrapped.obj)
+
+
+class _Dict(dict):
+    def method(self):
+        pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,15 @@
 from __future__ import absolute_import, print_function
 
 # Standard library
+import os
+from os.path import join
+from shutil import rmtree
+import tempfile
 import unittest
 
 # Local library
-from cinspect.index.serialize import _get_most_similar
+from cinspect.index import serialize
+from cinspect.index.serialize import _get_most_similar, get_index_path
 
 
 class TestVersions(unittest.TestCase):
@@ -19,3 +24,77 @@ class TestVersions(unittest.TestCase):
 
         # Then
         self.assertEqual('index-2.7.3.json', name)
+
+    def test_most_similar_prefers_same_minor_version(self):
+        # Given
+        cases = [
+            ('2.7.5', ['index-2.7.18.json', 'index-2.6.5.json'], 'index-2.7.18.json'),
+            ('3.11.2', ['index-3.10.2.json', 'index-3.11.14.json'],
+             'index-3.11.14.json'),
+        ]
+
+        for version, names, expected in cases:
+            # When
+            name = _get_most_similar(version, names)
+
+            # Then
+            self.assertEqual(expected, name)
+
+
+class TestIndexPath(unittest.TestCase):
+
+    #### 'TestCase' protocol ##################################################
+
+    def setUp(self):
+        self.index_dir = tempfile.mkdtemp()
+        self._index_dir = serialize.INDEX_DIR
+        serialize.INDEX_DIR = self.index_dir
+
+    def tearDown(self):
+        serialize.INDEX_DIR = self._index_dir
+        rmtree(self.index_dir)
+
+    #### Tests ################################################################
+
+    def test_should_prefer_exact_version_in_any_format(self):
+        # Given
+        self._touch('index-2.7.3.json', 'index-2.7.8.sqlite', 'index-2.7.8.json')
+
+        # When
+        path = get_index_path('2.7.8', only_existing=True)
+
+        # Then
+        self.assertEqual(join(self.index_dir, 'index-2.7.8.sqlite'), path)
+
+    def test_should_find_new_indexes_after_caching_path(self):
+        # Given
+        self._touch('index-2.7.3.json')
+        path = get_index_path('2.7.8', only_existing=True)
+
+        # When
+        self._touch('index-2.7.8.json')
+
+        # Then
+        self.assertEqual(join(self.index_dir, 'index-2.7.3.json'), path)
+        self.assertEqual(
+            join(self.index_dir, 'index-2.7.8.json'),
+            get_index_path('2.7.8', only_existing=True)
+        )
+
+    def test_should_raise_error_if_no_index_exists(self):
+        with self.assertRaises(OSError):
+            get_index_path('2.7.8', only_existing=True)
+
+    #### Private protocol #####################################################
+
+    def _touch(self, *names):
+        for name in names:
+            with open(join(self.index_dir, name), 'w') as f:
+                f.write('{}')
+        # Make sure the change is visible, even on coarse mtime filesystems.
+        stat = os.stat(self.index_dir)
+        os.utime(self.index_dir, (stat.st_atime, stat.st_mtime + 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -24,6 +24,9 @@ package_data = {'cinspect.tests': ['data/*.py']}
 entry_points = {
     "console_scripts": [
          "cinspect-download = cinspect.index.download:main",
+         "cinspect-convert = cinspect.index.convert:main",
+         "cinspect-server = cinspect.index.server:main",
+         "cinspect-benchmark = cinspect.index.benchmark:main",
     ],
 }
 